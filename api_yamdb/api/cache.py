@@ -0,0 +1,83 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from reviews.versions import get_versions
+
+RESPONSE_KEY = 'yamdb:response:{}'
+STATS_KEY = 'yamdb:response-cache:{}'
+HIT = 'hit'
+MISS = 'miss'
+
+
+def _count(event):
+    key = STATS_KEY.format(event)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def response_cache_stats():
+    keys = {event: STATS_KEY.format(event) for event in (HIT, MISS)}
+    values = cache.get_many(keys.values())
+    return {event: values.get(key, 0) for event, key in keys.items()}
+
+
+def get_request_role(request):
+    user = request.user
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return user.role
+
+
+class CachedResponseMixin:
+    # Модели, изменение которых меняет ответ list/retrieve
+    cache_models = ()
+
+    def get_response_cache_key(self, request):
+        parts = [
+            request.path,
+            request.GET.urlencode(),
+            get_request_role(request),
+            request.accepted_renderer.format,
+            *map(str, get_versions(*self.cache_models)),
+        ]
+        digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+        return RESPONSE_KEY.format(digest)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _count(HIT)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(MISS)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.add_post_render_callback(
+                lambda rendered: cache.set(
+                    key,
+                    (rendered.content, rendered['Content-Type']),
+                    settings.RESPONSE_CACHE_TIMEOUT,
+                )
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
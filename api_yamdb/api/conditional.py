@@ -0,0 +1,40 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from reviews.versions import get_versions
+
+
+def make_etag(request, versions):
+    parts = [request.path, request.GET.urlencode(), *map(str, versions)]
+    return quote_etag(hashlib.md5('|'.join(parts).encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    # ETag считается по счётчикам версий, без обращения к БД и
+    # сериализации: при совпадении сразу отдаётся 304. Last-Modified не
+    # отдаётся: он с точностью до секунды, и вторая запись в ту же
+    # секунду осталась бы незамеченной.
+    cache_models = ()
+
+    def get_conditional_versions(self):
+        return get_versions(*self.cache_models)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = make_etag(request, self.get_conditional_versions())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
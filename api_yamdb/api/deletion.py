@@ -0,0 +1,20 @@
+from rest_framework import status
+from rest_framework.response import Response
+from reviews.deletion import delete_with_dependents, schedule_deletion
+
+
+class BackgroundDestroyMixin:
+    # DELETE с ?background=true ставит удаление в очередь и сразу
+    # отвечает 202: объект скрыт из выдачи, а зависимые строки удаляет
+    # manage.py process_deletions.
+    def destroy(self, request, *args, **kwargs):
+        if request.query_params.get('background') not in ('1', 'true'):
+            return super().destroy(request, *args, **kwargs)
+        job = schedule_deletion(self.get_object())
+        return Response(
+            {'job': job.id, 'status': 'pending'},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def perform_destroy(self, instance):
+        delete_with_dependents(instance)
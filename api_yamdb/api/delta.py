@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from reviews.models import Tombstone
+
+
+def parse_since(value):
+    # ISO 8601 или Unix-время в миллисекундах (как у версий кэша)
+    try:
+        if value.isdigit():
+            since = datetime.fromtimestamp(
+                int(value) / 1000, tz=dt_timezone.utc
+            )
+        else:
+            since = parse_datetime(value)
+    except (OverflowError, ValueError, OSError):
+        since = None
+    if since is None:
+        raise serializers.ValidationError(
+            {'since': 'Ожидается дата ISO 8601 или время в миллисекундах'}
+        )
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+class SinceExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = (
+        'Удаления за этот период уже не хранятся: '
+        'загрузите список заново без since'
+    )
+    default_code = 'since_expired'
+
+
+class DeltaFeedMixin:
+    # ?since= в списке отдаёт только объекты, добавленные или изменённые
+    # после указанного момента, и id удалённых за это время, а также
+    # курсор для следующего запроса. Надгробия хранятся
+    # DELTA_TOMBSTONE_RETENTION секунд, более старый since - это 410.
+    delta_parent_kwarg = None
+
+    def list(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        if since is None:
+            return super().list(request, *args, **kwargs)
+        since = parse_since(since)
+        retention = timedelta(seconds=settings.DELTA_TOMBSTONE_RETENTION)
+        if since < timezone.now() - retention:
+            raise SinceExpired
+        return self.delta_response(since)
+
+    def delta_response(self, since):
+        limit = settings.DELTA_FEED_LIMIT
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(updated_at__gt=since)
+            .order_by('updated_at', 'id')
+        )
+        items = list(queryset[: limit + 1])
+        has_more = len(items) > limit
+        cursor = since
+        if has_more:
+            items = items[:limit]
+            cursor = items[-1].updated_at
+            # Объекты с тем же временем, что и последний, отдаются в этой
+            # же порции: иначе следующий запрос (updated_at > cursor)
+            # пропустил бы их.
+            items.extend(
+                queryset.filter(updated_at=cursor, id__gt=items[-1].id)
+            )
+        elif items:
+            cursor = items[-1].updated_at
+
+        tombstones = Tombstone.objects.filter(
+            model=queryset.model._meta.model_name,
+            parent_id=self.kwargs.get(self.delta_parent_kwarg),
+            deleted_at__gt=since,
+        )
+        if has_more:
+            tombstones = tombstones.filter(deleted_at__lte=cursor)
+        deleted = list(
+            tombstones.order_by('deleted_at').values_list(
+                'object_id', 'deleted_at'
+            )
+        )
+        if deleted and not has_more:
+            cursor = max(cursor, deleted[-1][1])
+        if not has_more:
+            # updated_at и deleted_at ставятся до коммита: транзакция,
+            # закоммиченная позже, может оказаться раньше курсора.
+            # Последние DELTA_FEED_OVERLAP секунд отдаются повторно,
+            # клиент сверяет объекты по id.
+            overlap = timedelta(seconds=settings.DELTA_FEED_OVERLAP)
+            cursor = max(since, cursor - overlap)
+
+        return Response(
+            {
+                'since': cursor.isoformat(),
+                'has_more': has_more,
+                'results': self.get_serializer(items, many=True).data,
+                'deleted': [object_id for object_id, _ in deleted],
+            }
+        )
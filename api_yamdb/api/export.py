@@ -0,0 +1,78 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from reviews.models import Comment, Review
+
+EXPORT_FIELDS = {
+    'reviews': (
+        Review,
+        {
+            'id': 'id',
+            'title_id': 'title_id',
+            'author': 'author__username',
+            'text': 'text',
+            'score': 'score',
+            'pub_date': 'pub_date',
+            'comment_count': 'comment_count',
+        },
+    ),
+    'comments': (
+        Comment,
+        {
+            'id': 'id',
+            'title_id': 'review__title_id',
+            'review_id': 'review_id',
+            'author': 'author__username',
+            'text': 'text',
+            'pub_date': 'pub_date',
+        },
+    ),
+}
+EXPORT_FORMATS = ('ndjson', 'csv')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_rows(kind, title_id=None, after_id=0, chunk_size=None):
+    # Строки читаются пачками по возрастанию id (keyset), поэтому память
+    # не зависит от объёма, а выгрузку можно продолжить с любого id.
+    model, fields = EXPORT_FIELDS[kind]
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    queryset = model.objects.order_by('id')
+    if title_id is not None:
+        title_field = fields['title_id']
+        queryset = queryset.filter(**{title_field: title_id})
+    last_id = after_id or 0
+    while True:
+        chunk = list(
+            queryset.filter(id__gt=last_id).values_list(
+                *fields.values()
+            )[:chunk_size]
+        )
+        for row in chunk:
+            yield dict(zip(fields, row))
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+class Echo:
+    # Буфер для csv.writer, который сразу отдаёт записанную строку
+    def write(self, value):
+        return value
+
+
+def render_rows(kind, rows, output_format):
+    if output_format == 'ndjson':
+        for row in rows:
+            line = json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+            yield f'{line}\n'
+        return
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS[kind][1])
+    for row in rows:
+        yield writer.writerow(row.values())
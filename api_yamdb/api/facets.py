@@ -0,0 +1,79 @@
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+from reviews.catalog import get_catalog
+from reviews.models import Category, Genre, GenreTitle, Title
+
+FACETS = ('genre', 'category', 'year')
+
+
+def slug_counts(model, rows, field):
+    # id из группировки заменяются слагами по каталогу процесса; строки
+    # удаляемых категорий в каталог не попадают и пропускаются
+    slugs = {obj.pk: slug for slug, obj in get_catalog(model).items()}
+    counts = [
+        {'slug': slugs[row[field]], 'count': row['count']}
+        for row in rows
+        if row[field] in slugs
+    ]
+    return sorted(counts, key=lambda item: (-item['count'], item['slug']))
+
+
+def facet_counts(queryset, facets):
+    # Один группирующий запрос на фасет по id отфильтрованных
+    # произведений, независимо от числа жанров, категорий и лет
+    ids = queryset.order_by().values('pk')
+    titles = Title.objects.filter(pk__in=ids).order_by()
+    counts = {}
+    if 'genre' in facets:
+        rows = (
+            GenreTitle.objects.filter(title__in=ids)
+            .order_by()
+            .values('genre_id')
+            .annotate(count=Count('title_id'))
+        )
+        counts['genre'] = slug_counts(Genre, rows, 'genre_id')
+    if 'category' in facets:
+        rows = (
+            titles.filter(category__isnull=False)
+            .values('category_id')
+            .annotate(count=Count('pk'))
+        )
+        counts['category'] = slug_counts(Category, rows, 'category_id')
+    if 'year' in facets:
+        counts['year'] = list(
+            titles.filter(year__isnull=False)
+            .values('year')
+            .annotate(count=Count('pk'))
+            .order_by('-year')
+        )
+    return counts
+
+
+class FacetCountsMixin:
+    # ?facets=genre,category,year (или ?facets=true - все фасеты)
+    # добавляет к списку число произведений по каждому значению
+    # с учётом текущих фильтров.
+    facets_param = 'facets'
+
+    def get_facets(self, request):
+        value = request.query_params.get(self.facets_param)
+        if not value:
+            return ()
+        if value in ('1', 'true'):
+            return FACETS
+        facets = [facet.strip() for facet in value.split(',')]
+        unknown = [facet for facet in facets if facet not in FACETS]
+        if unknown:
+            raise ValidationError(
+                {self.facets_param: f'Допустимые значения: {list(FACETS)}'}
+            )
+        return facets
+
+    def list(self, request, *args, **kwargs):
+        facets = self.get_facets(request)
+        response = super().list(request, *args, **kwargs)
+        if facets and response.status_code == 200:
+            response.data['facets'] = facet_counts(
+                self.filter_queryset(self.get_queryset()), facets
+            )
+        return response
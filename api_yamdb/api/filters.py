@@ -1,13 +1,82 @@
+from django.db.models.functions import Lower
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from reviews.catalog import get_catalog
+from reviews.expressions import CodePointCollate
+from reviews.models import Category, Genre, Title
+from reviews.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name='genre__slug')
-    category = filters.CharFilter(field_name='category__slug')
-    name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    genre = filters.CharFilter(method='filter_genre')
+    category = filters.CharFilter(method='filter_category')
+    name = filters.CharFilter(method='filter_name')
     year = filters.NumberFilter(field_name='year')
 
     class Meta:
         model = Title
         fields = ('genre', 'category', 'name', 'year')
+
+    # Слаг заменяется на id по каталогу процесса, и запрос обходится
+    # без соединения с таблицами жанров и категорий
+    def filter_genre(self, queryset, name, value):
+        genre = get_catalog(Genre).get(value)
+        if genre is None:
+            return queryset.none()
+        return queryset.filter(genre=genre.pk)
+
+    def filter_category(self, queryset, name, value):
+        # Удаляемых категорий в каталоге нет
+        category = get_catalog(Category).get(value)
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category_id=category.pk)
+
+    def filter_name(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+def prefix_upper_bound(prefix):
+    # Наименьшая строка, которая больше всех строк с этим началом
+    last = ord(prefix[-1])
+    if last == 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(last + 1)
+
+
+def prefix_search_key(field):
+    # Граница диапазона верна только при сравнении по кодам символов:
+    # с лингвистическим правилом glibc в PostgreSQL 'ѐ' < 'я' и диапазон
+    # для 'я' пуст. Индексы построены по тому же выражению
+    # (User.Meta.indexes).
+    return CodePointCollate(Lower(field))
+
+
+class PrefixSearchFilter(BaseFilterBackend):
+    # ?search= ищет по началу значения без учёта регистра, ?search_by=
+    # выбирает поле из view.prefix_search_fields. Диапазон по lower(поле)
+    # проходит по функциональному индексу, LIKE только уточняет
+    # совпадения внутри диапазона.
+    search_param = 'search'
+    field_param = 'search_by'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip().lower()
+        if not term:
+            return queryset
+        fields = view.prefix_search_fields
+        field = request.query_params.get(self.field_param, fields[0])
+        if field not in fields:
+            raise ValidationError(
+                {self.field_param: f'Допустимые значения: {list(fields)}'}
+            )
+        lookups = {'search_key__gte': term, 'search_key__startswith': term}
+        upper_bound = prefix_upper_bound(term)
+        if upper_bound is not None:
+            lookups['search_key__lt'] = upper_bound
+        return (
+            queryset.alias(search_key=prefix_search_key(field))
+            .filter(**lookups)
+            .order_by('search_key', 'pk')
+        )
@@ -0,0 +1,375 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import resolve
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.catalog import catalog_stats
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+BENCHMARK_USERNAME = 'benchmark_admin'
+
+
+def get_cases(admin):
+    title = Title.objects.filter(reviews_count__gt=0).order_by('pk').first()
+    if title is None:
+        raise CommandError(
+            'Нет произведений с отзывами: сначала выполните seed_data'
+        )
+    review = (
+        Review.objects.filter(title=title, comments__isnull=False)
+        .order_by('pk')
+        .first()
+    ) or Review.objects.filter(title=title).order_by('pk').first()
+    comment = Comment.objects.filter(review=review).order_by('pk').first()
+    category = title.category or Category.objects.order_by('pk').first()
+    genre = title.genre.order_by('pk').first() or Genre.objects.first()
+    user = review.author
+
+    titles = '/api/v1/titles/'
+    title_ids = ','.join(
+        str(pk) for pk in Title.objects.values_list('pk', flat=True)[:20]
+    )
+    reviews = f'{titles}{title.pk}/reviews/'
+    # Изменения за последний час: since старше срока хранения
+    # надгробий отвечает 410
+    since = int((time.time() - 60 * 60) * 1000)
+    comments = f'{reviews}{review.pk}/comments/'
+    new_title = {
+        'name': 'Benchmark title',
+        'year': 2000,
+        'description': 'Benchmark',
+        'genre': [genre.slug],
+        'category': category.slug,
+    }
+    cases = [
+        ('root', 'get', '/api/v1/', None),
+        ('users.list', 'get', '/api/v1/users/', None),
+        (
+            'users.search',
+            'get',
+            f'/api/v1/users/?search={user.username}',
+            None,
+        ),
+        (
+            'users.create',
+            'post',
+            '/api/v1/users/',
+            {'username': 'benchmark_new', 'email': 'benchmark_new@yamdb.fake'},
+        ),
+        ('users.retrieve', 'get', f'/api/v1/users/{user.username}/', None),
+        (
+            'users.update',
+            'patch',
+            f'/api/v1/users/{user.username}/',
+            {'bio': 'Benchmark'},
+        ),
+        ('users.delete', 'delete', f'/api/v1/users/{user.username}/', None),
+        (
+            'users.delete.background',
+            'delete',
+            f'/api/v1/users/{user.username}/?background=true',
+            None,
+        ),
+        ('users.me', 'get', '/api/v1/users/me/', None),
+        (
+            'users.bulk',
+            'post',
+            '/api/v1/users/bulk/',
+            {
+                'usernames': list(
+                    User.objects.exclude(username=BENCHMARK_USERNAME)
+                    .order_by('pk')
+                    .values_list('username', flat=True)[:100]
+                ),
+                'operation': 'set_role',
+                'role': 'moderator',
+            },
+        ),
+        (
+            'auth.signup',
+            'post',
+            '/api/v1/auth/signup/',
+            {
+                'username': 'benchmark_signup',
+                'email': 'benchmark_signup@yamdb.fake',
+            },
+        ),
+        (
+            'auth.token',
+            'post',
+            '/api/v1/auth/token/',
+            {
+                'username': admin.username,
+                'confirmation_code': default_token_generator.make_token(admin),
+            },
+        ),
+        ('categories.list', 'get', '/api/v1/categories/', None),
+        (
+            'categories.search',
+            'get',
+            f'/api/v1/categories/?search={category.name}',
+            None,
+        ),
+        (
+            'categories.create',
+            'post',
+            '/api/v1/categories/',
+            {'name': 'Benchmark', 'slug': 'benchmark'},
+        ),
+        (
+            'categories.delete',
+            'delete',
+            f'/api/v1/categories/{category.slug}/',
+            None,
+        ),
+        (
+            'categories.delete.background',
+            'delete',
+            f'/api/v1/categories/{category.slug}/?background=true',
+            None,
+        ),
+        ('genres.list', 'get', '/api/v1/genres/', None),
+        ('genres.search', 'get', f'/api/v1/genres/?search={genre.name}', None),
+        (
+            'genres.create',
+            'post',
+            '/api/v1/genres/',
+            {'name': 'Benchmark', 'slug': 'benchmark'},
+        ),
+        ('genres.delete', 'delete', f'/api/v1/genres/{genre.slug}/', None),
+        ('titles.list', 'get', titles, None),
+        ('titles.list.deep_page', 'get', f'{titles}?page=100', None),
+        ('titles.list.cursor', 'get', f'{titles}?pagination=cursor', None),
+        ('titles.facets', 'get', f'{titles}?facets=true', None),
+        (
+            'titles.facets.genre',
+            'get',
+            f'{titles}?genre={genre.slug}&facets=category,year',
+            None,
+        ),
+        ('titles.filter.genre', 'get', f'{titles}?genre={genre.slug}', None),
+        (
+            'titles.filter.category',
+            'get',
+            f'{titles}?category={category.slug}',
+            None,
+        ),
+        (
+            'titles.filter.name',
+            'get',
+            f'{titles}?name={title.name.split()[0]}',
+            None,
+        ),
+        ('titles.filter.year', 'get', f'{titles}?year={title.year}', None),
+        ('titles.create', 'post', titles, new_title),
+        (
+            'titles.create.bulk',
+            'post',
+            titles,
+            [
+                dict(new_title, name=f'Benchmark title {number}')
+                for number in range(100)
+            ],
+        ),
+        ('titles.retrieve', 'get', f'{titles}{title.pk}/', None),
+        (
+            'titles.update',
+            'patch',
+            f'{titles}{title.pk}/',
+            {'genre': [genre.slug]},
+        ),
+        ('titles.delete', 'delete', f'{titles}{title.pk}/', None),
+        (
+            'titles.delete.background',
+            'delete',
+            f'{titles}{title.pk}/?background=true',
+            None,
+        ),
+        (
+            'titles.score_distribution',
+            'get',
+            f'{titles}{title.pk}/score-distribution/',
+            None,
+        ),
+        ('titles.leaderboard', 'get', f'{titles}leaderboard/?limit=100', None),
+        ('reviews.list', 'get', reviews, None),
+        ('reviews.list.cursor', 'get', f'{reviews}?pagination=cursor', None),
+        ('reviews.delta', 'get', f'{reviews}?since={since}', None),
+        ('reviews.create', 'post', reviews, {'text': 'Benchmark', 'score': 5}),
+        ('reviews.retrieve', 'get', f'{reviews}{review.pk}/', None),
+        ('reviews.update', 'patch', f'{reviews}{review.pk}/', {'score': 1}),
+        ('reviews.delete', 'delete', f'{reviews}{review.pk}/', None),
+        (
+            'reviews.batch',
+            'get',
+            f'/api/v1/reviews/?title_ids={title_ids}&limit=5',
+            None,
+        ),
+        (
+            'export.reviews',
+            'get',
+            f'/api/v1/export/reviews/?title_id={title.pk}',
+            None,
+        ),
+        (
+            'export.comments.csv',
+            'get',
+            '/api/v1/export/comments/?output=csv',
+            None,
+        ),
+        ('comments.list', 'get', comments, None),
+        ('comments.create', 'post', comments, {'text': 'Benchmark'}),
+    ]
+    if comment is not None:
+        cases += [
+            ('comments.retrieve', 'get', f'{comments}{comment.pk}/', None),
+            (
+                'comments.update',
+                'patch',
+                f'{comments}{comment.pk}/',
+                {'text': 'Benchmark'},
+            ),
+            ('comments.delete', 'delete', f'{comments}{comment.pk}/', None),
+        ]
+    return cases
+
+
+def run_case(client, method, path, data, trace_memory=False):
+    # Каждый прогон откатывается, чтобы повторы шли по тем же данным,
+    # и начинается с пустого кэша ответов.
+    cache.clear()
+    reset_queries()
+    with transaction.atomic():
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(path, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        elapsed = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        transaction.set_rollback(True)
+    return response.status_code, len(queries), elapsed, peak
+
+
+def compare(old_report, new_report):
+    old = {result['name']: result for result in old_report['results']}
+    lines = []
+    for result in new_report['results']:
+        before = old.get(result['name'])
+        if before is None:
+            continue
+        lines.append(
+            '{name:32} {old:>10.2f} -> {new:>10.2f} ms   '
+            'queries {old_q} -> {new_q}'.format(
+                name=result['name'],
+                old=before['wall_ms']['median'],
+                new=result['wall_ms']['median'],
+                old_q=before['queries'],
+                new_q=result['queries'],
+            )
+        )
+    return '\n'.join(lines)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время, число запросов к БД и пик памяти для каждого '
+        'маршрута API на текущих данных и пишет отчёт в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--output', help='Файл отчёта (по умолчанию stdout)'
+        )
+        parser.add_argument(
+            '--compare', help='Отчёт предыдущего прогона для сравнения'
+        )
+
+    # Свой кэш процесса: cache.clear() перед каждым замером не должен
+    # стирать версии, лимиты и пользователей в общем кэше приложения
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'yamdb-benchmark',
+            }
+        },
+    )
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            report = self.run(options['repeat'])
+            transaction.set_rollback(True)
+
+        content = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content)
+        else:
+            self.stdout.write(content)
+        if options['compare']:
+            with open(options['compare']) as previous:
+                self.stderr.write(compare(json.load(previous), report))
+
+    def run(self, repeat):
+        admin = User.objects.create_user(
+            username=BENCHMARK_USERNAME,
+            email=f'{BENCHMARK_USERNAME}@yamdb.fake',
+            role='admin',
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        results = []
+        for name, method, path, data in get_cases(admin):
+            status, queries, _, peak = run_case(
+                client, method, path, data, trace_memory=True
+            )
+            timings = [
+                run_case(client, method, path, data)[2] * 1000
+                for _ in range(repeat)
+            ]
+            results.append(
+                {
+                    'name': name,
+                    'route': resolve(path.split('?')[0]).url_name,
+                    'method': method.upper(),
+                    'path': path,
+                    'status': status,
+                    'queries': queries,
+                    'wall_ms': {
+                        'min': min(timings),
+                        'median': statistics.median(timings),
+                        'max': max(timings),
+                    },
+                    'peak_memory_kb': peak // 1024,
+                }
+            )
+        return {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': connection.vendor,
+            'dataset': {
+                'users': User.objects.count() - 1,
+                'titles': Title.objects.count(),
+                'reviews': Review.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'repeat': repeat,
+            'catalog': catalog_stats(),
+            'results': results,
+        }
@@ -0,0 +1,122 @@
+import json
+import statistics
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from reviews.models import User
+
+from .benchmark_api import BENCHMARK_USERNAME, run_case
+
+USERNAME_PREFIX = 'bench_user_'
+
+
+def top_up_users(total):
+    existing = User.objects.filter(
+        username__startswith=USERNAME_PREFIX
+    ).count()
+    users = (
+        User(
+            username=f'{USERNAME_PREFIX}{number:07d}',
+            email=f'{USERNAME_PREFIX}{number:07d}@yamdb.fake',
+        )
+        for number in range(existing, total)
+    )
+    while True:
+        batch = list(islice(users, settings.BULK_BATCH_SIZE))
+        if not batch:
+            break
+        User.objects.bulk_create(batch)
+
+
+def contains_search(term):
+    # Поиск, как его делал SearchFilter: icontains и сортировка по pk
+    users = User.objects.filter(username__icontains=term).order_by('pk')
+    return users.count(), list(users[:5])
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет поиск пользователей по началу имени и почты на разном '
+        'числе пользователей; данные откатываются после замера'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10_000, 100_000, 1_000_000],
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--output', help='Файл отчёта (по умолчанию stdout)'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            results = self.run(sorted(options['sizes']), options['repeat'])
+            transaction.set_rollback(True)
+        content = json.dumps(results, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content)
+        else:
+            self.stdout.write(content)
+        for result in results:
+            self.stderr.write(
+                '{size:>9} {name:16} {median:>8.2f} ms'.format(
+                    size=result['users'],
+                    name=result['name'],
+                    median=result['wall_ms']['median'],
+                )
+            )
+
+    def run(self, sizes, repeat):
+        admin = User.objects.create_user(
+            username=BENCHMARK_USERNAME,
+            email=f'{BENCHMARK_USERNAME}@yamdb.fake',
+            role='admin',
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        results = []
+        for size in sizes:
+            top_up_users(size)
+            middle = f'{USERNAME_PREFIX}{size // 2:07d}'
+            cases = {
+                'prefix.username': f'/api/v1/users/?search={middle.upper()}',
+                'prefix.email': (
+                    f'/api/v1/users/?search={middle}@&search_by=email'
+                ),
+            }
+            for name, path in cases.items():
+                timings = [
+                    run_case(client, 'get', path, None)[2] * 1000
+                    for _ in range(repeat)
+                ]
+                results.append(self.result(size, name, timings))
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                contains_search(middle)
+                timings.append((time.perf_counter() - started) * 1000)
+            results.append(self.result(size, 'contains.orm', timings))
+        return results
+
+    def result(self, size, name, timings):
+        return {
+            'users': size,
+            'name': name,
+            'wall_ms': {
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'max': max(timings),
+            },
+        }
@@ -0,0 +1,44 @@
+from api.export import EXPORT_FIELDS, EXPORT_FORMATS, export_rows, render_rows
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает отзывы или комментарии в NDJSON/CSV пачками по id; '
+        'прерванную выгрузку можно продолжить через --after-id'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORT_FIELDS))
+        parser.add_argument(
+            '--output-format', choices=EXPORT_FORMATS, default='ndjson'
+        )
+        parser.add_argument('--title-id', type=int, default=None)
+        parser.add_argument('--after-id', type=int, default=0)
+        parser.add_argument('--chunk-size', type=int, default=None)
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Файл для записи (по умолчанию stdout)',
+        )
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        rows = export_rows(
+            kind,
+            title_id=options['title_id'],
+            after_id=options['after_id'],
+            chunk_size=options['chunk_size'],
+        )
+        # При дозаписи в существующий файл заголовок CSV не повторяется
+        append = bool(options['after_id'])
+        lines = render_rows(kind, rows, options['output_format'])
+        if append and options['output_format'] == 'csv':
+            next(lines)
+        if options['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        mode = 'a' if append else 'w'
+        with open(options['output'], mode, encoding='utf-8', newline='') as f:
+            f.writelines(lines)
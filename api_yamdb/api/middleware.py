@@ -0,0 +1,78 @@
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('api.queries')
+
+
+class QueryRecorder:
+    # Считает запросы ко всем БД через execute_wrapper, поэтому работает
+    # и без DEBUG. Отпечаток запроса - SQL без параметров: одинаковые
+    # отпечатки внутри одного запроса к API обычно означают N+1.
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self.wrappers = [
+            connection.execute_wrapper(self)
+            for connection in connections.all()
+        ]
+        for wrapper in self.wrappers:
+            wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        for wrapper in reversed(self.wrappers):
+            wrapper.__exit__(*exc_info)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_ms(self):
+        return sum(duration for _, duration in self.queries) * 1000
+
+    @property
+    def duplicates(self):
+        fingerprints = Counter(sql for sql, _ in self.queries)
+        return {sql: count for sql, count in fingerprints.items() if count > 1}
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_INSTRUMENTATION:
+            return self.get_response(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        duplicates = recorder.duplicates
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time'] = f'{recorder.total_ms:.2f}'
+        response['X-Query-Duplicates'] = str(sum(duplicates.values()))
+        match = request.resolver_match
+        endpoint = (
+            f'{request.method} {match.view_name if match else request.path}'
+        )
+        budget = settings.QUERY_BUDGETS.get(endpoint)
+        if duplicates or (budget is not None and recorder.count > budget):
+            logger.warning(
+                '%s: %d запросов (бюджет %s), повторы: %s',
+                endpoint,
+                recorder.count,
+                budget,
+                duplicates,
+            )
+        return response
@@ -0,0 +1,46 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    # ?pagination=cursor включает курсорный режим: страница выбирается
+    # по индексу без COUNT(*) и OFFSET, N-я стоит столько же, сколько первая.
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_ordering = '-id'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or CursorPagination.cursor_query_param in request.query_params
+        )
+
+    def get_cursor_paginator(self):
+        paginator = CursorPagination()
+        paginator.ordering = self.cursor_ordering
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.get_cursor_paginator()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitlePagination(OptionalCursorPagination):
+    cursor_ordering = '-id'
+
+
+class PubDatePagination(OptionalCursorPagination):
+    # id разводит записи с одинаковой датой: иначе смещение внутри
+    # курсора пропускает или повторяет их
+    cursor_ordering = ('-pub_date', '-id')
@@ -0,0 +1,34 @@
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from reviews.models import Review
+
+
+def latest_reviews(title_ids, limit):
+    # Один запрос: номер отзыва внутри произведения считает оконная
+    # функция, внешний запрос берёт первые limit строк каждого.
+    ranked = (
+        Review.objects.filter(
+            title_id__in=title_ids, title__pending_delete=False
+        )
+        .annotate(
+            position=Window(
+                expression=RowNumber(),
+                partition_by=[F('title_id')],
+                order_by=[F('pub_date').desc(), F('id').desc()],
+            )
+        )
+        .values('id', 'position')
+    )
+    sql, params = ranked.query.sql_with_params()
+    return (
+        Review.objects.filter(
+            id__in=RawSQL(
+                f'SELECT ranked.id FROM ({sql}) ranked '
+                'WHERE ranked.position <= %s',
+                (*params, limit),
+            )
+        )
+        .select_related('author')
+        .order_by('title_id', '-pub_date', '-id')
+    )
@@ -1,7 +1,21 @@
-from django.db.models import Avg
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
+from reviews.catalog import get_catalog, resolve_slugs
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.rankings import refresh_title_ranking
+from reviews.users import USER_OPERATIONS
 from reviews.validators import validate_username
+from reviews.versions import bump_version
+
+SIGNUP_CONFLICT_MESSAGE = 'Почта или имя уже использовались'
+STALE_CATALOG_MESSAGE = 'Жанр или категория были удалены, повторите запрос'
 
 
 class RegisterDataSerializer(serializers.Serializer):
@@ -14,18 +28,38 @@ class RegisterDataSerializer(serializers.Serializer):
     email = serializers.EmailField(max_length=254, required=True)
 
     def validate(self, data):
-        if User.objects.filter(
-            username=data['username'], email=data['email']
-        ).exists():
-            return data
-        if (
-            User.objects.filter(username=data['username']).exists()
-            or User.objects.filter(email=data['email']).exists()
-        ):
+        # Совпадающий пользователь и конфликт определяются одним
+        # запросом по уникальным индексам username и email.
+        users = list(
+            User.objects.filter(
+                Q(username=data['username']) | Q(email=data['email'])
+            )[:2]
+        )
+        self.existing = next(
+            (
+                user
+                for user in users
+                if user.username == data['username']
+                and user.email == data['email']
+            ),
+            None,
+        )
+        if users and self.existing is None:
+            raise serializers.ValidationError(SIGNUP_CONFLICT_MESSAGE)
+        return data
+
+    def create(self, validated_data):
+        if self.existing is not None:
+            return self.existing
+        # Параллельная регистрация с тем же именем или почтой упирается
+        # в уникальные индексы, а не в 500
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
             raise serializers.ValidationError(
-                'Почта или имя уже использовались'
+                {api_settings.NON_FIELD_ERRORS_KEY: [SIGNUP_CONFLICT_MESSAGE]}
             )
-        return data
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -43,6 +77,33 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
 
 
+class UserBulkSerializer(serializers.Serializer):
+    usernames = serializers.ListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+    )
+    operation = serializers.ChoiceField(choices=USER_OPERATIONS)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+
+    def validate_usernames(self, value):
+        if len(value) > settings.USERS_BULK_MAX:
+            raise serializers.ValidationError(
+                f'Не больше {settings.USERS_BULK_MAX} пользователей за запрос'
+            )
+        return value
+
+    def validate(self, data):
+        if data['operation'] == 'set_role' and 'role' not in data:
+            raise serializers.ValidationError(
+                {'role': 'Укажите роль для операции set_role'}
+            )
+        if data['operation'] != 'set_role' and 'role' in data:
+            raise serializers.ValidationError(
+                {'role': 'Роль указывается только для операции set_role'}
+            )
+        return data
+
+
 class TokenAccessSerializer(serializers.Serializer):
     username = serializers.CharField(required=True)
     confirmation_code = serializers.CharField(required=True)
@@ -51,10 +112,17 @@ class TokenAccessSerializer(serializers.Serializer):
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        exclude = ('id',)
+        exclude = ('id', 'pending_delete')
         lookup_field = 'slug'
         extra_kwargs = {'url': {'lookup_field': 'slug'}}
 
+    def to_representation(self, instance):
+        # Пока у произведений обнуляется удаляемая категория, она уже
+        # не показывается
+        if instance.pending_delete:
+            return None
+        return super().to_representation(instance)
+
 
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
@@ -67,44 +135,284 @@ class GenreSerializer(serializers.ModelSerializer):
 class TitleListSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, required=False)
     category = CategorySerializer(many=False, required=True)
-    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Title
-        fields = '__all__'
-
-    def get_rating(self, obj):
-        return obj.reviews.all().aggregate(Avg('score'))['score__avg']
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
+        read_only_fields = ('rating',)
 
 
 class TitleRetrieveSerializer(serializers.ModelSerializer):
     genre = GenreSerializer(many=True, required=False)
     category = CategorySerializer(many=False, required=True)
     pagination_class = None
-    rating = serializers.SerializerMethodField()
-
-    def get_rating(self, obj):
-        return obj.reviews.all().aggregate(Avg('score'))['score__avg']
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
+        read_only_fields = ('rating',)
+
+
+class ManySlugRelatedField(serializers.ManyRelatedField):
+    # Все слаги списка проверяются одним запросом
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        slugs = list(dict.fromkeys(str(slug) for slug in data))
+        objects = child.get_objects(slugs)
+        for slug in slugs:
+            if slug not in objects:
+                child.fail(
+                    'does_not_exist', slug_name=child.slug_field, value=slug
+                )
+        return [objects[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManySlugRelatedField(**list_kwargs)
+
+    def get_objects(self, slugs):
+        return self.get_queryset().in_bulk(slugs, field_name=self.slug_field)
+
+
+class CatalogSlugRelatedField(BulkSlugRelatedField):
+    # Слаги жанров и категорий разрешаются по каталогу процесса
+    # (reviews/catalog.py) без поиска по слагу в БД
+    def get_objects(self, slugs):
+        return resolve_slugs(self.queryset.model, slugs)
+
+    def to_internal_value(self, data):
+        obj = self.get_objects([data]).get(str(data))
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field, value=data)
+        return obj
+
+
+def set_title_genres(title, genres, refresh_ranking=True):
+    # Удаляются и добавляются только изменившиеся строки GenreTitle.
+    # Удаление идёт без сигналов на каждую строку: версия и рейтинговые
+    # строки обновляются один раз на весь набор изменений.
+    current = set(
+        GenreTitle.objects.filter(title=title).values_list(
+            'genre_id', flat=True
+        )
+    )
+    new = {genre.id for genre in genres}
+    if current == new:
+        return
+    if current - new:
+        removed = GenreTitle.objects.filter(
+            title=title, genre_id__in=current - new
+        )
+        removed._raw_delete(removed.db)
+    if new - current:
+        GenreTitle.objects.bulk_create(
+            GenreTitle(title=title, genre_id=genre_id)
+            for genre_id in new - current
+        )
+    bump_version(GenreTitle)
+    if refresh_ranking:
+        refresh_title_ranking(title.pk)
+
+
+@contextmanager
+def catalog_write():
+    # Слаги разрешены по каталогу процесса без проверки в БД. Жанр или
+    # категорию могли удалить в другом процессе; внешние ключи
+    # проверяются при фиксации транзакции, и тогда каталог
+    # перечитывается, а запрос получает 400 вместо 500.
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        get_catalog(Genre, refresh=True)
+        get_catalog(Category, refresh=True)
+        raise serializers.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: [STALE_CATALOG_MESSAGE]}
+        )
 
 
 class TitlePostPatchSerializer(serializers.ModelSerializer):
-    genre = serializers.SlugRelatedField(
+    genre = CatalogSlugRelatedField(
         required=True,
         many=True,
         slug_field='slug',
         queryset=Genre.objects.all(),
     )
-    category = serializers.SlugRelatedField(
-        required=True, slug_field='slug', queryset=Category.objects.all()
+    category = CatalogSlugRelatedField(
+        required=True,
+        slug_field='slug',
+        queryset=Category.objects.filter(pending_delete=False),
     )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
+        read_only_fields = ('rating',)
+
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = Title.objects.create(**validated_data)
+        set_title_genres(title, genres)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        if genres is not None:
+            # Рейтинговые строки пересоберёт сохранение произведения ниже
+            set_title_genres(instance, genres, refresh_ranking=False)
+        return super().update(instance, validated_data)
+
+
+class TitleBulkCreateSerializer(serializers.ListSerializer):
+    # Слаги проверяются по каталогу процесса, уникальность названий
+    # всего списка - одним запросом; произведения и связи с жанрами
+    # вставляются пачками.
+
+    def to_internal_value(self, data):
+        # Ошибки возвращаются списком по элементам, как у ListSerializer
+        attrs = super().to_internal_value(data)
+        genres = resolve_slugs(
+            Genre,
+            list(
+                dict.fromkeys(
+                    slug for item in attrs for slug in item['genre_slugs']
+                )
+            ),
+        )
+        categories = resolve_slugs(
+            Category,
+            list(dict.fromkeys(item['category']['slug'] for item in attrs)),
+        )
+        names = [item['name'] for item in attrs]
+        taken = set(
+            Title.objects.filter(name__in=names).values_list(
+                'name', flat=True
+            )
+        )
+        errors = []
+        seen = set()
+        for item in attrs:
+            item_errors = {}
+            missing = [
+                slug for slug in item['genre_slugs'] if slug not in genres
+            ]
+            if missing:
+                item_errors['genre'] = [
+                    f'Жанр {missing[0]} не существует.'
+                ]
+            if item['category']['slug'] not in categories:
+                item_errors['category'] = [
+                    f'Категория {item["category"]["slug"]} не существует.'
+                ]
+            if item['name'] in taken or item['name'] in seen:
+                item_errors['name'] = [
+                    'Произведение с таким названием уже существует.'
+                ]
+            seen.add(item['name'])
+            errors.append(item_errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for item in attrs:
+            item['category'] = categories[item['category']['slug']]
+            item['genres'] = [
+                genres[slug] for slug in dict.fromkeys(item['genre_slugs'])
+            ]
+        return attrs
+
+    def create(self, validated_data):
+        with catalog_write():
+            return self.create_titles(validated_data)
+
+    def create_titles(self, validated_data):
+        titles = [
+            Title(
+                name=item['name'],
+                year=item.get('year'),
+                description=item['description'],
+                category=item['category'],
+            )
+            for item in validated_data
+        ]
+        batch_size = settings.BULK_BATCH_SIZE
+        Title.objects.bulk_create(titles, batch_size=batch_size)
+        if titles and titles[0].pk is None:
+            # Не все СУБД возвращают id из пакетной вставки
+            ids = dict(
+                Title.objects.filter(
+                    name__in=[title.name for title in titles]
+                ).values_list('name', 'id')
+            )
+            for title in titles:
+                title.pk = ids[title.name]
+        GenreTitle.objects.bulk_create(
+            (
+                GenreTitle(title=title, genre=genre)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genres']
+            ),
+            batch_size=batch_size,
+        )
+        bump_version(Title, GenreTitle)
+        for title, item in zip(titles, validated_data):
+            title.genre_slugs = [genre.slug for genre in item['genres']]
+        return titles
+
+
+class TitleBulkItemSerializer(serializers.ModelSerializer):
+    genre = serializers.ListField(
+        child=serializers.SlugField(), source='genre_slugs', allow_empty=False
+    )
+    category = serializers.SlugField(source='category.slug')
+
+    class Meta:
+        model = Title
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
+        read_only_fields = ('rating',)
+        # Уникальность названий проверяется для всего списка сразу
+        extra_kwargs = {'name': {'validators': []}}
+        list_serializer_class = TitleBulkCreateSerializer
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -116,8 +424,24 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'author', 'title', 'text', 'score', 'pub_date')
-        read_only_fields = ('author', 'title', 'pub_date', 'id')
+        fields = (
+            'id',
+            'author',
+            'title',
+            'text',
+            'score',
+            'pub_date',
+            'comment_count',
+            'last_comment_at',
+        )
+        read_only_fields = (
+            'author',
+            'title',
+            'pub_date',
+            'id',
+            'comment_count',
+            'last_comment_at',
+        )
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,104 @@
+import hashlib
+import math
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    # Корзина на num_requests запросов, которая равномерно наполняется
+    # за duration секунд (GCRA). В кэше лежит одно число - момент в мс,
+    # когда корзина снова будет полной, и оно меняется только атомарными
+    # add/incr/decr. Поэтому параллельные запросы не перерасходуют лимит,
+    # а с общим кэшем (проверка reviews.E001) лимит действует на все
+    # процессы gunicorn.
+    cache_format = 'yamdb:throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Лимиты читаются из настроек при каждом создании, а не при
+        # импорте, как у SimpleRateThrottle.
+        return settings.AUTH_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        # IP клиента; за прокси - из X-Forwarded-For с учётом NUM_PROXIES
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        value = self.get_ident_value(request)
+        if not value:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': value}
+
+    def take_token(self, now, interval):
+        # Ключ живёт не меньше, чем до заполнения корзины
+        timeout = self.duration + math.ceil(interval / 1000)
+        self.cache.add(self.key, now, timeout)
+        try:
+            full_at = self.cache.incr(self.key, interval)
+        except ValueError:
+            # Ключ истёк между add и incr
+            self.cache.add(self.key, now, timeout)
+            full_at = self.cache.incr(self.key, interval)
+        if full_at < now + interval:
+            # Корзина простаивала и уже полна: отсчёт идёт от текущего
+            # момента. Параллельный запрос мог сделать то же - тогда
+            # корзина лишь строже, но не щедрее.
+            full_at = self.cache.incr(self.key, now + interval - full_at)
+        self.cache.touch(self.key, timeout)
+        return full_at
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        now = int(self.timer() * 1000)
+        interval = int(self.duration * 1000 / self.num_requests)
+        full_at = self.take_token(now, interval)
+        excess = full_at - now - self.duration * 1000
+        if excess <= 0:
+            return True
+        # Отказ не расходует запас
+        self.cache.decr(self.key, interval)
+        self.wait_seconds = excess / 1000
+        return False
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class FieldThrottle(TokenBucketThrottle):
+    # Лимит на значение поля запроса (имя пользователя, почта); значение
+    # хэшируется, чтобы ключ кэша был допустимым для любого бэкенда.
+    field = None
+
+    def get_ident_value(self, request):
+        data = request.data
+        value = data.get(self.field) if hasattr(data, 'get') else None
+        if not isinstance(value, str) or not value:
+            return None
+        return hashlib.md5(value.strip().lower().encode()).hexdigest()
+
+
+class SignupIPThrottle(TokenBucketThrottle):
+    scope = 'signup_ip'
+
+
+class SignupUsernameThrottle(FieldThrottle):
+    scope = 'signup_username'
+    field = 'username'
+
+
+class SignupEmailThrottle(FieldThrottle):
+    scope = 'signup_email'
+    field = 'email'
+
+
+class TokenIPThrottle(TokenBucketThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(FieldThrottle):
+    scope = 'token_username'
+    field = 'username'
@@ -1,6 +1,6 @@
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       ReviewViewSet, TitleViewSet, UserViewSet,
-                       send_confirmation_code, token_access)
+                       ReviewViewSet, TitleViewSet, UserViewSet, export,
+                       reviews_batch, send_confirmation_code, token_access)
 from django.urls import include, path
 from rest_framework import routers
 
@@ -24,4 +24,6 @@ urlpatterns = [
     path('v1/', include(v1_router.urls)),
     path('v1/auth/token/', token_access, name='token'),
     path('v1/auth/signup/', send_confirmation_code, name='signup'),
+    path('v1/reviews/', reviews_batch, name='reviews-batch'),
+    path('v1/export/<str:kind>/', export, name='export'),
 ]
@@ -1,46 +1,82 @@
 from api.serializers import (CategorySerializer, CommentSerializer,
                              GenreSerializer, RegisterDataSerializer,
-                             ReviewSerializer, TitleListSerializer,
-                             TitlePostPatchSerializer, TitleRetrieveSerializer,
-                             TokenAccessSerializer, UserSerializer)
-from django.conf import settings
+                             ReviewSerializer, TitleBulkItemSerializer,
+                             TitleListSerializer, TitlePostPatchSerializer,
+                             TitleRetrieveSerializer, TokenAccessSerializer,
+                             UserBulkSerializer, UserSerializer, catalog_write)
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.db import IntegrityError, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, serializers, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.filters import SearchFilter
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.catalog import get_catalog
+from reviews.deletion import delete_with_dependents
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleRanking, TitleScore, User)
+from reviews.outbox import enqueue_email
+from reviews.users import bulk_user_operation
+from reviews.versions import get_scoped_version
 
-from .filters import TitleFilter
+from .cache import CachedResponseMixin, CachedRetrieveMixin
+from .conditional import ConditionalGetMixin
+from .deletion import BackgroundDestroyMixin
+from .delta import DeltaFeedMixin
+from .export import (CONTENT_TYPES, EXPORT_FIELDS, EXPORT_FORMATS, export_rows,
+                     render_rows)
+from .facets import FacetCountsMixin
+from .filters import PrefixSearchFilter, TitleFilter
+from .pagination import PubDatePagination, TitlePagination
 from .permissions import (IsAdminOrSuperUser, IsAdminOrSuperUserOrReadOnly,
                           PermissionReviewComment)
+from .queries import latest_reviews
+from .throttling import (SignupEmailThrottle, SignupIPThrottle,
+                         SignupUsernameThrottle, TokenIPThrottle,
+                         TokenUsernameThrottle)
+
+SCORE_RANGE = range(1, 11)
+# title_id задаёт постоянный порядок одинаковых мест между запросами
+LEADERBOARD_ORDERING = {
+    'rating': ('-rating', '-reviews_count', 'title_id'),
+    'reviews': ('-reviews_count', '-rating', 'title_id'),
+}
+LEADERBOARD_MAX_LIMIT = 100
+REVIEWS_BATCH_MAX_TITLES = 50
+REVIEWS_BATCH_MAX_LIMIT = 20
+
+
+def get_catalog_object(model, slug):
+    obj = get_catalog(model).get(slug)
+    if obj is None:
+        raise Http404
+    return obj
 
 
 # Система подтверждения через e-mail
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(
+    [SignupIPThrottle, SignupUsernameThrottle, SignupEmailThrottle]
+)
 def send_confirmation_code(request):
     serializer = RegisterDataSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
-    user, _ = User.objects.get_or_create(
-        username=serializer.data["username"], email=serializer.data["email"]
-    )
-
-    confirmation_code = default_token_generator.make_token(user)
-
-    send_mail(
-        subject="YaMDb registration",
-        message=f"Your confirmation code: {confirmation_code}",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        fail_silently=False,
-    )
+    # Письмо ставится в очередь в той же транзакции, что и пользователь;
+    # отправляет его отдельный процесс (manage.py send_emails).
+    with transaction.atomic():
+        user = serializer.save()
+        confirmation_code = default_token_generator.make_token(user)
+        enqueue_email(
+            subject="YaMDb registration",
+            body=f"Your confirmation code: {confirmation_code}",
+            recipient=user.email,
+        )
 
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -48,6 +84,7 @@ def send_confirmation_code(request):
 # Работа с токеном
 @api_view(["POST"])
 @permission_classes([AllowAny])
+@throttle_classes([TokenIPThrottle, TokenUsernameThrottle])
 def token_access(request):
     serializer = TokenAccessSerializer(data=request.data)
     if not serializer.is_valid():
@@ -66,14 +103,72 @@ def token_access(request):
     )
 
 
+# Последние отзывы сразу нескольких произведений
+@api_view(['GET'])
+@permission_classes([PermissionReviewComment])
+def reviews_batch(request):
+    try:
+        title_ids = list(
+            dict.fromkeys(
+                int(title_id)
+                for title_id in request.query_params['title_ids'].split(',')
+            )
+        )
+        limit = int(request.query_params.get('limit', 5))
+    except (KeyError, ValueError):
+        raise serializers.ValidationError(
+            {'title_ids': 'Укажите id произведений через запятую'}
+        )
+    if len(title_ids) > REVIEWS_BATCH_MAX_TITLES:
+        raise serializers.ValidationError(
+            {'title_ids': f'Не больше {REVIEWS_BATCH_MAX_TITLES} id'}
+        )
+    limit = max(1, min(limit, REVIEWS_BATCH_MAX_LIMIT))
+
+    grouped = {title_id: [] for title_id in title_ids}
+    for review in latest_reviews(title_ids, limit):
+        grouped[review.title_id].append(ReviewSerializer(review).data)
+    return Response(grouped)
+
+
+# Потоковая выгрузка отзывов и комментариев
+@api_view(['GET'])
+@permission_classes([IsAdminOrSuperUser])
+def export(request, kind):
+    if kind not in EXPORT_FIELDS:
+        raise Http404
+    output_format = request.query_params.get('output', 'ndjson')
+    if output_format not in EXPORT_FORMATS:
+        raise serializers.ValidationError(
+            {'output': f'Допустимые значения: {list(EXPORT_FORMATS)}'}
+        )
+    try:
+        title_id = request.query_params.get('title_id')
+        title_id = None if title_id is None else int(title_id)
+        after_id = int(request.query_params.get('after_id', 0))
+    except ValueError:
+        raise serializers.ValidationError(
+            {'detail': 'title_id и after_id должны быть целыми числами'}
+        )
+    rows = export_rows(kind, title_id=title_id, after_id=after_id)
+    response = StreamingHttpResponse(
+        render_rows(kind, rows, output_format),
+        content_type=CONTENT_TYPES[output_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{output_format}"'
+    )
+    return response
+
+
 # Работа с юзерами
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all().order_by('pk')
+class UserViewSet(BackgroundDestroyMixin, viewsets.ModelViewSet):
+    queryset = User.objects.filter(pending_delete=False).order_by('pk')
     serializer_class = UserSerializer
     permission_classes = (IsAdminOrSuperUser,)
     lookup_field = 'username'
-    filter_backends = (SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (PrefixSearchFilter,)
+    prefix_search_fields = ('username', 'email')
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     @action(
@@ -82,16 +177,41 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def me(self, request):
+        # request.user из кэша содержит только поля для проверки прав и
+        # может быть устаревшим: профиль читается и пишется в свежую
+        # строку, иначе вместе с ним сохранилась бы старая роль
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == "GET":
-            serializer = UserSerializer(request.user)
+            serializer = UserSerializer(user)
             return Response(serializer.data)
-        serializer = UserSerializer(
-            request.user, data=request.data, partial=True
-        )
+        serializer = UserSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save(role=request.user.role)
+        serializer.save(role=user.role)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @action(methods=['post'], detail=False)
+    def bulk(self, request):
+        # Смена роли, блокировка или удаление списка пользователей
+        # одним запросом; удаление идёт через фоновую очередь
+        serializer = UserBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        results = bulk_user_operation(
+            data['usernames'],
+            data['operation'],
+            role=data.get('role'),
+            actor=request.user,
+        )
+        return Response(
+            {
+                'operation': data['operation'],
+                'results': [
+                    {'username': username, 'status': result}
+                    for username, result in results.items()
+                ],
+            }
+        )
+
 
 class ListAddDeleteViewSet(
     mixins.ListModelMixin,
@@ -102,8 +222,11 @@ class ListAddDeleteViewSet(
     pass
 
 
-class CategoryViewSet(ListAddDeleteViewSet):
-    queryset = Category.objects.all()
+class CategoryViewSet(
+    CachedResponseMixin, BackgroundDestroyMixin, ListAddDeleteViewSet
+):
+    queryset = Category.objects.filter(pending_delete=False)
+    cache_models = (Category,)
     serializer_class = CategorySerializer
     permission_classes = [IsAdminOrSuperUserOrReadOnly]
     filter_backends = (filters.SearchFilter,)
@@ -111,8 +234,9 @@ class CategoryViewSet(ListAddDeleteViewSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(ListAddDeleteViewSet):
+class GenreViewSet(CachedResponseMixin, ListAddDeleteViewSet):
     queryset = Genre.objects.all()
+    cache_models = (Genre,)
     serializer_class = GenreSerializer
     permission_classes = [IsAdminOrSuperUserOrReadOnly]
     filter_backends = (filters.SearchFilter,)
@@ -120,51 +244,187 @@ class GenreViewSet(ListAddDeleteViewSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(
+    ConditionalGetMixin,
+    CachedRetrieveMixin,
+    FacetCountsMixin,
+    BackgroundDestroyMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = [IsAdminOrSuperUserOrReadOnly]
+    cache_models = (Title, Category, Genre, GenreTitle)
+    # Нечисловой id отсекается маршрутизатором (404), до запросов к БД
+    lookup_value_regex = r'\d+'
     filter_backends = (DjangoFilterBackend,)
     filterset_fields = ('category', 'name', 'year', 'genre')
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+
+    def get_queryset(self):
+        # Категория подтягивается JOIN'ом, жанры всей страницы - одним
+        # запросом, рейтинг хранится в самой таблице произведений.
+        return (
+            Title.objects.filter(pending_delete=False)
+            .select_related('category')
+            .prefetch_related('genre')
+        )
+
+    @action(methods=['get'], detail=True, url_path='score-distribution')
+    def score_distribution(self, request, pk=None):
+        counts = dict(
+            TitleScore.objects.filter(
+                title_id=pk, title__pending_delete=False
+            ).values_list('score', 'count')
+        )
+        if not counts:
+            get_object_or_404(Title, pk=pk, pending_delete=False)
+        distribution = {
+            score: counts.get(score, 0) for score in SCORE_RANGE
+        }
+        return Response(
+            {
+                'title': int(pk),
+                'count': sum(distribution.values()),
+                'distribution': distribution,
+            }
+        )
+
+    def is_bulk_create(self):
+        return self.action == 'create' and isinstance(self.request.data, list)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.is_bulk_create():
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
+    @action(methods=['get'], detail=False)
+    def leaderboard(self, request):
+        ordering = LEADERBOARD_ORDERING.get(
+            request.query_params.get('order', 'rating')
+        )
+        if ordering is None:
+            raise serializers.ValidationError(
+                {'order': f'Допустимые значения: {list(LEADERBOARD_ORDERING)}'}
+            )
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise serializers.ValidationError({'limit': 'Нужно целое число'})
+        limit = max(1, min(limit, LEADERBOARD_MAX_LIMIT))
+
+        scope = TitleRanking.SCOPE_ALL
+        # Слаг разрешается по каталогу процесса без запроса к БД
+        if 'category' in request.query_params:
+            category = get_catalog_object(
+                Category, request.query_params['category']
+            )
+            scope = TitleRanking.category_scope(category.pk)
+        elif 'genre' in request.query_params:
+            genre = get_catalog_object(Genre, request.query_params['genre'])
+            scope = TitleRanking.genre_scope(genre.pk)
+
+        rows = (
+            TitleRanking.objects.filter(
+                scope=scope, title__pending_delete=False
+            )
+            .order_by(*ordering)
+            .values('title_id', 'title__name', 'rating', 'reviews_count')
+        )[:limit]
+        return Response(
+            [
+                {
+                    'rank': rank,
+                    'id': row['title_id'],
+                    'name': row['title__name'],
+                    'rating': row['rating'],
+                    'reviews_count': row['reviews_count'],
+                }
+                for rank, row in enumerate(rows, start=1)
+            ]
+        )
 
     def get_serializer_class(self):
         if self.action == 'list':
             return TitleListSerializer
         if self.action == 'retrieve':
             return TitleRetrieveSerializer
+        if self.is_bulk_create():
+            return TitleBulkItemSerializer
         return TitlePostPatchSerializer
 
+    def perform_create(self, serializer):
+        if self.is_bulk_create():
+            # Ссылки пакета проверяет TitleBulkCreateSerializer.create
+            serializer.save()
+            return
+        with catalog_write():
+            serializer.save()
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def perform_update(self, serializer):
+        with catalog_write():
+            serializer.save()
+
+
+class ReviewViewSet(
+    ConditionalGetMixin, DeltaFeedMixin, viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
     permission_classes = [PermissionReviewComment]
+    pagination_class = PubDatePagination
+    delta_parent_kwarg = 'title_id'
 
     def get_queryset(self):
         title_id = self.kwargs.get("title_id")
-        return Review.objects.filter(title=title_id)
+        return Review.objects.filter(
+            title=title_id, title__pending_delete=False
+        ).select_related('author')
+
+    def get_conditional_versions(self):
+        return (get_scoped_version(Review, self.kwargs.get('title_id')),)
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get("title_id")
-        title = get_object_or_404(Title, id=title_id)
-        queryset = Review.objects.filter(
-            title=title_id, author=self.request.user
-        )
-        if len(queryset) > 0:
+        if not Title.objects.filter(
+            id=title_id, pending_delete=False
+        ).exists():
+            raise Http404
+        # Повторный отзыв отсекает ограничение unique_title_author в БД
+        try:
+            serializer.save(author=self.request.user, title_id=title_id)
+        except IntegrityError:
             raise serializers.ValidationError(
                 'Нельзя два раза писать отзыв на одно произведение!'
             )
-        serializer.save(author=self.request.user, title=title)
+
+    def perform_destroy(self, instance):
+        delete_with_dependents(instance)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalGetMixin, DeltaFeedMixin, viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
     permission_classes = [PermissionReviewComment]
+    pagination_class = PubDatePagination
+    delta_parent_kwarg = 'review_id'
 
     def get_queryset(self):
-        review_id = self.kwargs.get("review_id")
-        return Comment.objects.filter(review=review_id)
+        return Comment.objects.filter(
+            review=self.kwargs.get("review_id"),
+            review__title=self.kwargs.get("title_id"),
+            review__title__pending_delete=False,
+        ).select_related('author')
+
+    def get_conditional_versions(self):
+        return (get_scoped_version(Comment, self.kwargs.get('review_id')),)
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get("review_id")
-        review = get_object_or_404(Review, id=review_id)
+        # Загруженный отзыв уходит в save: сигналам комментария нужен
+        # его title_id, и отдельный запрос за ним не делается
+        review = get_object_or_404(
+            Review,
+            id=self.kwargs.get("review_id"),
+            title=self.kwargs.get("title_id"),
+            title__pending_delete=False,
+        )
         serializer.save(author=self.request.user, review=review)
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
@@ -32,6 +33,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -135,13 +137,95 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    # Число прокси перед приложением (nginx в docker-compose). IP для
+    # лимитов берётся из X-Forwarded-For только с их стороны, иначе
+    # клиент мог бы подставить в заголовок любой адрес.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=0)),
+}
+
+# Корзины токенов для регистрации и получения токена: 'N/период' -
+# не больше N запросов подряд, запас восстанавливается за период.
+AUTH_THROTTLE_RATES = {
+    'signup_ip': '20/hour',
+    'signup_username': '5/hour',
+    'signup_email': '5/hour',
+    'token_ip': '60/hour',
+    'token_username': '10/hour',
+}
+
+# Версии кэша, лимиты запросов и пользователи из JWT должны быть общими
+# для всех процессов gunicorn и фоновых команд: в docker-compose это
+# memcached. LocMemCache годится только для тестов и локального запуска,
+# manage.py check --deploy его не пропускает (reviews/checks.py).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+# Сколько секунд пользователь из JWT хранится в кэше (reviews/identity.py)
+USER_CACHE_TIMEOUT = 60
+
+BULK_BATCH_SIZE = 1000
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Максимум объектов в одном ответе ленты изменений (?since=)
+DELTA_FEED_LIMIT = 500
+# Насколько курсор ленты отстаёт от последнего изменения, в секундах
+DELTA_FEED_OVERLAP = 5
+# Срок хранения надгробий удалённых объектов; старые удаляет
+# manage.py process_deletions
+DELTA_TOMBSTONE_RETENTION = 60 * 60 * 24 * 30
+
+# Фоновое удаление (DELETE ...?background=true, manage.py process_deletions)
+DELETION_BATCH_SIZE = 200
+DELETION_MAX_ATTEMPTS = 5
+DELETION_RETRY_DELAY = 60
+DELETION_JOB_LEASE = 60 * 10
+DELETION_POLL_INTERVAL = 5
+
+# Максимум пользователей в одном POST /api/v1/users/bulk/
+USERS_BULK_MAX = 500
+
+# Заголовки X-Query-Count/X-Query-Time/X-Query-Duplicates в ответах API
+QUERY_INSTRUMENTATION = os.getenv('QUERY_INSTRUMENTATION') == 'True'
+# Допустимое число SQL-запросов для метода и имени маршрута; превышение
+# пишется в лог api.queries и проверяется в tests/test_query_budget.py
+QUERY_BUDGETS = {
+    'GET users-list': 3,
+    'GET users-detail': 2,
+    'GET users-me': 2,
+    'GET categories-list': 3,
+    'GET genres-list': 3,
+    'GET title-list': 4,
+    'GET title-detail': 3,
+    'GET title-leaderboard': 2,
+    'GET title-score-distribution': 2,
+    'GET reviews-list': 3,
+    'GET reviews-detail': 2,
+    'GET comments-list': 3,
+    'GET comments-detail': 2,
+    'GET reviews-batch': 2,
+    'POST title-list': 12,
+    'PATCH title-detail': 12,
+    'POST reviews-list': 11,
+    'POST comments-list': 7,
+    'POST signup': 8,
+    'POST users-bulk': 5,
 }
 
 SIMPLE_JWT = {
@@ -155,4 +239,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 EMAIL_HOST_USER = 'example@example.ru'
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend'
+)
+
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Секунды: первая повторная попытка, далее задержка удваивается
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_LEASE = 60 * 5
+EMAIL_OUTBOX_POLL_INTERVAL = 5
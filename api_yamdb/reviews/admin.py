@@ -3,7 +3,9 @@ from import_export import resources, widgets
 from import_export.admin import ImportExportModelAdmin
 from import_export.fields import Field
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .deletion import failed_jobs, retry_jobs
+from .models import (Category, Comment, DeletionJob, Genre, GenreTitle,
+                     OutgoingEmail, Review, Title, User)
 
 
 class GenreResource(resources.ModelResource):
@@ -27,7 +29,15 @@ class TitleResource(resources.ModelResource):
 @admin.register(Title)
 class TitleAdmin(ImportExportModelAdmin):
     resource_classes = (TitleResource,)
-    list_display = ('name', 'year', 'rating', 'description', 'category')
+    list_display = (
+        'name',
+        'year',
+        'rating',
+        'reviews_count',
+        'description',
+        'category',
+    )
+    readonly_fields = ('rating', 'reviews_count', 'score_sum')
 
 
 class GenreTitleResource(resources.ModelResource):
@@ -107,7 +117,74 @@ class ReviewResource(resources.ModelResource):
 @admin.register(Review)
 class ReviewAdmin(ImportExportModelAdmin):
     resource_classes = (ReviewResource,)
-    list_display = ('text', 'pub_date', 'title_id', 'author', 'score')
+    list_display = (
+        'text',
+        'pub_date',
+        'title_id',
+        'author',
+        'score',
+        'comment_count',
+    )
+    readonly_fields = ('comment_count', 'last_comment_at')
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'created_at',
+        'attempts',
+        'next_attempt_at',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
+    readonly_fields = ('created_at', 'attempts', 'sent_at', 'last_error')
+
+
+class DeletionJobStatusFilter(admin.SimpleListFilter):
+    title = 'статус'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('pending', 'В очереди'),
+            ('failed', 'Ошибка'),
+            ('finished', 'Выполнено'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'failed':
+            return queryset.filter(pk__in=failed_jobs().values('pk'))
+        if self.value() == 'pending':
+            return queryset.filter(finished_at__isnull=True).exclude(
+                pk__in=failed_jobs().values('pk')
+            )
+        if self.value() == 'finished':
+            return queryset.filter(finished_at__isnull=False)
+        return queryset
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'model',
+        'object_id',
+        'created_at',
+        'attempts',
+        'finished_at',
+        'last_error',
+    )
+    list_filter = (DeletionJobStatusFilter, 'model', 'finished_at')
+    readonly_fields = ('created_at', 'attempts', 'finished_at', 'last_error')
+    actions = ('retry',)
+
+    @admin.action(description='Повторить удаление')
+    def retry(self, request, queryset):
+        self.message_user(
+            request, f'Задач снова в очереди: {retry_jobs(queryset)}'
+        )
 
 
 admin.site.register(User, UserAdmin)
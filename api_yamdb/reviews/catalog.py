@@ -0,0 +1,55 @@
+from collections import Counter
+
+from .models import Category, Genre
+from .versions import get_versions
+
+# Жанры и категории в памяти процесса: {модель: (версия, {слаг: объект})}.
+# Таблицы маленькие и меняются редко, поэтому слаги разрешаются без
+# запросов к БД. Изменения в других процессах видны по версии из общего
+# кэша (reviews/versions.py), которую сигналы сдвигают при каждой записи;
+# при записи промах перечитывает каталог из БД (resolve_slugs).
+CATALOG_QUERYSETS = {
+    Genre: lambda: Genre.objects.all(),
+    Category: lambda: Category.objects.filter(pending_delete=False),
+}
+
+_catalogs = {}
+refreshes = Counter()
+
+
+def get_catalog(model, refresh=False):
+    # Объекты общие для всех запросов процесса - их нельзя изменять
+    version = get_versions(model)[0]
+    cached = _catalogs.get(model)
+    if not refresh and cached is not None and cached[0] == version:
+        return cached[1]
+    objects = {obj.slug: obj for obj in CATALOG_QUERYSETS[model]()}
+    _catalogs[model] = (version, objects)
+    refreshes[model._meta.model_name] += 1
+    return objects
+
+
+def resolve_slugs(model, slugs):
+    # Слаги для записи. Версия из другого процесса может прийти позже
+    # самой строки, поэтому промах перечитывает каталог. Найденным
+    # объектам запись доверяет: ссылку на удалённый тем временем жанр
+    # отсекает внешний ключ (api/serializers.py catalog_write).
+    catalog = get_catalog(model)
+    if any(slug not in catalog for slug in slugs):
+        catalog = get_catalog(model, refresh=True)
+    return {slug: catalog[slug] for slug in slugs if slug in catalog}
+
+
+def catalog_stats():
+    return {
+        model._meta.model_name: {
+            'size': len(_catalogs[model][1]) if model in _catalogs else 0,
+            'refreshes': refreshes[model._meta.model_name],
+        }
+        for model in CATALOG_QUERYSETS
+    }
+
+
+def reset_catalogs():
+    _catalogs.clear()
+    refreshes.clear()
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f'Кэш {backend} не общий для процессов: версии кэша, лимиты '
+            'запросов и сброс пользователей из JWT не действуют между '
+            'воркерами',
+            hint='Укажите CACHE_BACKEND=django.core.cache.backends.'
+            'memcached.PyMemcacheCache и CACHE_LOCATION',
+            id='reviews.E001',
+        )
+    ]
@@ -0,0 +1,204 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .identity import forget_users
+from .models import (Category, Comment, DeletionJob, Review, Title, Tombstone,
+                     User)
+from .signals import batch_deletes
+from .versions import bump_scoped_version, bump_version
+
+logger = logging.getLogger('reviews.deletion')
+
+DELETION_MODELS = {
+    model._meta.model_name: model for model in (Title, Category, User)
+}
+
+
+def hide_for_deletion(model, ids):
+    # Объекты сразу скрываются из выдачи, а зависимые строки пачками
+    # удаляет manage.py process_deletions.
+    hide = {'pending_delete': True}
+    if model is User:
+        # Неактивный пользователь не проходит JWT-аутентификацию
+        hide['is_active'] = False
+    model.objects.filter(pk__in=ids).update(**hide)
+    if model is User:
+        forget_users(*ids)
+    bump_version(model)
+    if model is Title:
+        for title_id in ids:
+            bump_scoped_version(Review, title_id)
+
+
+def schedule_deletion(instance):
+    model = type(instance)
+    with transaction.atomic():
+        hide_for_deletion(model, [instance.pk])
+        return DeletionJob.objects.create(
+            model=model._meta.model_name, object_id=instance.pk
+        )
+
+
+def schedule_deletions(model, ids):
+    # Пакетный вариант: одно обновление и одна вставка задач
+    with transaction.atomic():
+        hide_for_deletion(model, ids)
+        DeletionJob.objects.bulk_create(
+            DeletionJob(model=model._meta.model_name, object_id=object_id)
+            for object_id in ids
+        )
+
+
+def delete_with_dependents(target):
+    # target - объект или queryset. Отзывы и комментарии из каскада
+    # обрабатываются пачкой, а не сигналами на каждую строку
+    with transaction.atomic(), batch_deletes():
+        target.delete()
+
+
+def deletion_steps(job):
+    # Пары (queryset, изменения): пустые изменения - удаление строк.
+    # Комментарии удаляются раньше отзывов, чтобы каскад от отзыва
+    # не выходил за размер пачки; счётчики и рейтинги пересчитывают
+    # обычные сигналы удаления.
+    object_id = job.object_id
+    if job.model == 'title':
+        return [
+            (Comment.objects.filter(review__title_id=object_id), {}),
+            (Review.objects.filter(title_id=object_id), {}),
+        ]
+    if job.model == 'category':
+        return [
+            (Title.objects.filter(category_id=object_id), {'category': None})
+        ]
+    return [
+        (Comment.objects.filter(author_id=object_id), {}),
+        (Comment.objects.filter(review__author_id=object_id), {}),
+        (Review.objects.filter(author_id=object_id), {}),
+    ]
+
+
+def process_batch(queryset, changes, batch_size):
+    ids = list(
+        queryset.order_by('pk').values_list('pk', flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0
+    with transaction.atomic():
+        batch = queryset.model.objects.filter(pk__in=ids)
+        if changes:
+            batch.update(**changes)
+            # update() не вызывает сигналов, кэш сбрасывается здесь
+            bump_version(queryset.model)
+        else:
+            delete_with_dependents(batch)
+    return len(ids)
+
+
+def extend_lease(job):
+    # Пока задача выполняется, другой обработчик не должен её забрать
+    DeletionJob.objects.filter(pk=job.pk).update(
+        next_attempt_at=timezone.now()
+        + timedelta(seconds=settings.DELETION_JOB_LEASE)
+    )
+
+
+def run_job(job, batch_size=None):
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    for queryset, changes in deletion_steps(job):
+        while process_batch(queryset, changes, batch_size) == batch_size:
+            extend_lease(job)
+    with transaction.atomic():
+        delete_with_dependents(
+            DELETION_MODELS[job.model].objects.filter(pk=job.object_id)
+        )
+        DeletionJob.objects.filter(pk=job.pk).update(
+            finished_at=timezone.now(), last_error=''
+        )
+
+
+def claim_jobs(limit):
+    # Та же «аренда», что и у очереди писем (reviews/outbox.py)
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            DeletionJob.objects.filter(
+                finished_at__isnull=True,
+                attempts__lt=settings.DELETION_MAX_ATTEMPTS,
+                next_attempt_at__lte=now,
+            )
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'id')[:limit]
+        )
+        DeletionJob.objects.filter(id__in=[job.id for job in jobs]).update(
+            next_attempt_at=now
+            + timedelta(seconds=settings.DELETION_JOB_LEASE)
+        )
+    return jobs
+
+
+def run_pending_jobs(limit=1, batch_size=None):
+    done, failed = 0, 0
+    for job in claim_jobs(limit):
+        try:
+            run_job(job, batch_size)
+        except Exception as error:
+            attempts = job.attempts + 1
+            DeletionJob.objects.filter(pk=job.pk).update(
+                attempts=attempts,
+                last_error=str(error),
+                next_attempt_at=timezone.now()
+                + timedelta(
+                    seconds=settings.DELETION_RETRY_DELAY * 2 ** (attempts - 1)
+                ),
+            )
+            failed += 1
+            if attempts >= settings.DELETION_MAX_ATTEMPTS:
+                # Дальше задача не выполняется, а объект остаётся
+                # скрытым: нужна ручная проверка (фильтр в админке)
+                logger.error(
+                    'Фоновое удаление %s %s не выполнено за %s попыток: %s',
+                    job.model,
+                    job.object_id,
+                    attempts,
+                    error,
+                )
+        else:
+            done += 1
+    return done, failed
+
+
+def failed_jobs():
+    return DeletionJob.objects.filter(
+        finished_at__isnull=True,
+        attempts__gte=settings.DELETION_MAX_ATTEMPTS,
+    )
+
+
+def retry_jobs(jobs):
+    return jobs.filter(finished_at__isnull=True).update(
+        attempts=0, next_attempt_at=timezone.now()
+    )
+
+
+def purge_tombstones(batch_size=None):
+    # Лента изменений не принимает since старше срока хранения
+    # (ответ 410), поэтому более старые надгробия не нужны
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    border = timezone.now() - timedelta(
+        seconds=settings.DELTA_TOMBSTONE_RETENTION
+    )
+    purged = 0
+    while True:
+        ids = list(
+            Tombstone.objects.filter(deleted_at__lt=border)
+            .order_by('deleted_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return purged
+        purged += Tombstone.objects.filter(pk__in=ids).delete()[0]
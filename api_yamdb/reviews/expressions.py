@@ -0,0 +1,25 @@
+from django.db.models import Func
+
+
+class CodePointCollate(Func):
+    # Сравнение строк по кодам символов. В PostgreSQL это COLLATE "C",
+    # в SQLite - встроенное правило BINARY, с которым строки и так
+    # сравниваются по умолчанию. Одно выражение годится и для индекса
+    # (User.Meta.indexes), и для запроса, поэтому состояние миграций
+    # совпадает со схемой на любой базе.
+    template = '%(expressions)s COLLATE %(collation)s'
+    collation = 'C'
+
+    def __init__(self, expression):
+        super().__init__(expression)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        extra_context.setdefault(
+            'collation', connection.ops.quote_name(self.collation)
+        )
+        return super().as_sql(compiler, connection, **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, collation='BINARY', **extra_context
+        )
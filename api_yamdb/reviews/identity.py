@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import User
+
+USER_KEY = 'yamdb:user:{}'
+# Только то, что нужно аутентификации и проверке прав: хэш пароля,
+# почта и профиль в общий кэш не попадают
+USER_FIELDS = ('pk', 'username', 'role', 'is_superuser', 'is_active')
+
+
+def get_user(user_id):
+    # Пользователь для аутентификации: из кэша, при промахе - одним
+    # запросом. Кэш сбрасывается сигналами при изменении пользователя.
+    # Возвращается несохранённый User только с полями USER_FIELDS.
+    key = USER_KEY.format(user_id)
+    fields = cache.get(key)
+    if fields is None:
+        fields = User.objects.filter(pk=user_id).values(*USER_FIELDS).first()
+        if fields is None:
+            return None
+        cache.set(key, fields, settings.USER_CACHE_TIMEOUT)
+    return User(**fields)
+
+
+def forget_users(*user_ids):
+    keys = [USER_KEY.format(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Ещё раз после фиксации: параллельный запрос мог успеть положить
+    # в кэш запись до изменения
+    transaction.on_commit(lambda: cache.delete_many(keys))
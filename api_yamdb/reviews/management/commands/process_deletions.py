@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.deletion import failed_jobs, purge_tombstones, run_pending_jobs
+from reviews.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые удаления произведений, категорий и '
+        'пользователей и чистит устаревшие надгробия'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.DELETION_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.DELETION_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = run_pending_jobs(batch_size=options['batch_size'])
+            if done or failed:
+                self.stdout.write(
+                    f'Удалений выполнено: {done}, с ошибкой: {failed}'
+                )
+                continue
+            # Очередь пуста - время убрать устаревшие надгробия
+            purged = purge_tombstones(options['batch_size'])
+            if purged:
+                self.stdout.write(f'Удалено старых надгробий: {purged}')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        pending = DeletionJob.objects.filter(finished_at__isnull=True).count()
+        self.stdout.write(self.style.SUCCESS(f'Удалений в очереди: {pending}'))
+        failed = failed_jobs().count()
+        if failed:
+            # Ненулевой код выхода для cron и мониторинга
+            raise CommandError(
+                f'Удалений, исчерпавших попытки: {failed} '
+                '(админка: «Фоновые удаления», статус «Ошибка»)'
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import TitleRanking
+from reviews.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = 'Полностью перестраивает таблицу рейтинга произведений'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Строк в рейтинге: {TitleRanking.objects.count()}'
+            )
+        )
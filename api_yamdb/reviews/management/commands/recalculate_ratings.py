@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.signals import recalculate_title_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинг и распределение оценок произведений '
+        'по всем отзывам'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = recalculate_title_ratings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитан рейтинг произведений: {updated}')
+        )
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from reviews.models import Comment, Review
+from reviews.signals import latest_comment_subquery
+from reviews.versions import bump_scoped_version
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у всех отзывов'
+
+    def handle(self, *args, **options):
+        counts = (
+            Comment.objects.filter(review=OuterRef('pk'))
+            .order_by()
+            .values('review')
+            .annotate(value=Count('id'))
+            .values('value')
+        )
+        actual = {
+            'comment_count': Coalesce(Subquery(counts), 0),
+            'last_comment_at': latest_comment_subquery(),
+        }
+        with transaction.atomic():
+            # Обновляются только расходящиеся отзывы: по ним же
+            # сбрасываются версии списков отзывов и комментариев
+            rows = (
+                Review.objects.annotate(
+                    actual_count=actual['comment_count'],
+                    actual_last=actual['last_comment_at'],
+                )
+                .values_list(
+                    'pk',
+                    'title_id',
+                    'comment_count',
+                    'actual_count',
+                    'last_comment_at',
+                    'actual_last',
+                )
+                .iterator()
+            )
+            stale = {
+                pk: title_id
+                for pk, title_id, count, new_count, last, new_last in rows
+                if (count, last) != (new_count, new_last)
+            }
+            ids = list(stale)
+            for start in range(0, len(ids), BATCH_SIZE):
+                Review.objects.filter(
+                    pk__in=ids[start:start + BATCH_SIZE]
+                ).update(**actual)
+            for review_id in stale:
+                bump_scoped_version(Comment, review_id)
+            for title_id in set(stale.values()):
+                bump_scoped_version(Review, title_id)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Пересчитаны комментарии отзывов: {len(stale)}'
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from reviews.seeding import seed
+
+
+class Command(BaseCommand):
+    help = 'Наполняет БД детерминированными тестовыми данными'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--reviews', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        seed(
+            options['titles'],
+            options['reviews'],
+            options['comments'],
+            seed=options['seed'],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Создано произведений: {titles}, отзывов: {reviews}, '
+                'комментариев: {comments}'.format(**options)
+            )
+        )
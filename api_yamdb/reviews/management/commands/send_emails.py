@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.outbox import deliver_batch, queue_depth
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящей почты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help='Пауза в секундах, когда очередь пуста',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать готовые письма и завершиться',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Только показать размер очереди',
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.write_depth()
+            return
+        while True:
+            sent, failed = deliver_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, ошибок: {failed}'
+                )
+            if sent + failed < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        self.write_depth()
+
+    def write_depth(self):
+        depth = queue_depth()
+        self.stdout.write(
+            self.style.SUCCESS(
+                'В очереди: {pending} (готовы к отправке: {ready}), '
+                'не доставлено: {failed}'.format(**depth)
+            )
+        )
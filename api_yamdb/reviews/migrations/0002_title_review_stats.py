@@ -0,0 +1,94 @@
+# Generated by Django 3.2 on 2026-10-17 06:18
+
+import re
+
+import django.core.validators
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_title_review_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('reviews', 'Title')
+
+    def title_reviews_subquery(aggregate):
+        return Subquery(
+            Review.objects.filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+            .annotate(value=aggregate)
+            .values('value')
+        )
+
+    Title.objects.update(
+        reviews_count=Coalesce(title_reviews_subquery(Count('id')), 0),
+        score_sum=Coalesce(title_reviews_subquery(Sum('score')), 0),
+        rating=title_reviews_subquery(Avg('score')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Количество отзывов'
+            ),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Сумма оценок'
+            ),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(
+                unique=True,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        re.compile('^[-a-zA-Z0-9_]+\\Z'),
+                        'Enter a valid “slug” consisting of letters, '
+                        'numbers, underscores or hyphens.',
+                        'invalid',
+                    ),
+                    django.core.validators.MaxLengthValidator(limit_value=50),
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='slug',
+            field=models.SlugField(
+                unique=True,
+                validators=[
+                    django.core.validators.RegexValidator(
+                        re.compile('^[-a-zA-Z0-9_]+\\Z'),
+                        'Enter a valid “slug” consisting of letters, '
+                        'numbers, underscores or hyphens.',
+                        'invalid',
+                    ),
+                    django.core.validators.MaxLengthValidator(limit_value=50),
+                ],
+            ),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='first_name',
+            field=models.CharField(
+                blank=True, max_length=150, verbose_name='first name'
+            ),
+        ),
+        migrations.RunPython(
+            fill_title_review_stats, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,94 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# SQL зафиксирован в миграции: дальнейшие изменения поиска
+# (reviews/search.py) вносятся новыми миграциями
+POSTGRES_INSTALL = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS reviews_title_search_vector_gin '
+    'ON reviews_title USING gin (search_vector)',
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_trgm '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+    'CREATE OR REPLACE FUNCTION reviews_title_search_vector() '
+    'RETURNS trigger AS $$ BEGIN '
+    "NEW.search_vector := setweight(to_tsvector('simple', "
+    "coalesce(NEW.name, '')), 'A') || "
+    "setweight(to_tsvector('simple', "
+    "coalesce(NEW.description, '')), 'B'); "
+    'RETURN NEW; END $$ LANGUAGE plpgsql',
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector ON reviews_title',
+    'CREATE TRIGGER reviews_title_search_vector '
+    'BEFORE INSERT OR UPDATE OF name, description ON reviews_title '
+    'FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector()',
+    'UPDATE reviews_title SET name = name',
+)
+POSTGRES_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS reviews_title_search_vector ON reviews_title',
+    'DROP FUNCTION IF EXISTS reviews_title_search_vector()',
+    'DROP INDEX IF EXISTS reviews_title_name_trgm',
+    'DROP INDEX IF EXISTS reviews_title_search_vector_gin',
+)
+SQLITE_INSTALL = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5('
+    "name, description, content='reviews_title', content_rowid='id', "
+    "tokenize='trigram')",
+    'CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert '
+    'AFTER INSERT ON reviews_title BEGIN '
+    'INSERT INTO reviews_title_fts(rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END',
+    'CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete '
+    'AFTER DELETE ON reviews_title BEGIN '
+    'INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, '
+    "description) VALUES ('delete', old.id, old.name, old.description); END",
+    'CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update '
+    'AFTER UPDATE OF name, description ON reviews_title BEGIN '
+    'INSERT INTO reviews_title_fts(reviews_title_fts, rowid, name, '
+    "description) VALUES ('delete', old.id, old.name, old.description); "
+    'INSERT INTO reviews_title_fts(rowid, name, description) '
+    'VALUES (new.id, new.name, new.description); END',
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+STATEMENTS = {
+    'postgresql': (POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    'sqlite': (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def execute(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for statement in statements[index]:
+        schema_editor.execute(statement, params=None)
+
+
+def install(apps, schema_editor):
+    execute(schema_editor, 0)
+
+
+def uninstall(apps, schema_editor):
+    execute(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_review_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.2 on 2026-10-17 06:25
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_title_scores(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    TitleScore = apps.get_model('reviews', 'TitleScore')
+    TitleScore.objects.bulk_create(
+        TitleScore(**row)
+        for row in Review.objects.order_by()
+        .values('title_id', 'score')
+        .annotate(count=Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScore',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'score',
+                    models.SmallIntegerField(
+                        validators=[
+                            django.core.validators.MaxValueValidator(10),
+                            django.core.validators.MinValueValidator(1),
+                        ]
+                    ),
+                ),
+                ('count', models.PositiveIntegerField(default=0)),
+                (
+                    'title',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='score_counts',
+                        to='reviews.title',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Распределение оценок',
+                'verbose_name_plural': 'Распределения оценок',
+                'ordering': ('title', 'score'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlescore',
+            constraint=models.UniqueConstraint(
+                fields=('title', 'score'), name='unique_title_score'
+            ),
+        ),
+        migrations.RunPython(fill_title_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 3.2 on 2026-10-17 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    rows = []
+    titles = Title.objects.filter(reviews_count__gt=0).prefetch_related(
+        'genre'
+    )
+    for title in titles:
+        scopes = ['all']
+        if title.category_id is not None:
+            scopes.append(f'category:{title.category_id}')
+        scopes.extend(f'genre:{genre.pk}' for genre in title.genre.all())
+        rows.extend(
+            TitleRanking(
+                scope=scope,
+                title_id=title.pk,
+                rating=title.rating,
+                reviews_count=title.reviews_count,
+            )
+            for scope in dict.fromkeys(scopes)
+        )
+    TitleRanking.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_titlescore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('scope', models.CharField(max_length=64)),
+                ('rating', models.FloatField(null=True)),
+                ('reviews_count', models.PositiveIntegerField()),
+                (
+                    'title',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='rankings',
+                        to='reviews.title',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(
+                fields=['scope', '-rating', '-reviews_count'],
+                name='ranking_by_rating',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(
+                fields=['scope', '-reviews_count', '-rating'],
+                name='ranking_by_reviews',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='titleranking',
+            constraint=models.UniqueConstraint(
+                fields=('scope', 'title'), name='unique_scope_title'
+            ),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
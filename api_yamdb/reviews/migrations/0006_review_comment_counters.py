@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-17 06:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_counters(apps, schema_editor):
+    Comment = apps.get_model('reviews', 'Comment')
+    Review = apps.get_model('reviews', 'Review')
+    comments = Comment.objects.filter(review=OuterRef('pk')).order_by()
+    Review.objects.update(
+        comment_count=Coalesce(
+            Subquery(
+                comments.values('review')
+                .annotate(value=Count('id'))
+                .values('value')
+            ),
+            0,
+        ),
+        last_comment_at=Subquery(
+            comments.order_by('-pub_date').values('pub_date')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_titleranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='comment_count',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Количество комментариев'
+            ),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_at',
+            field=models.DateTimeField(
+                blank=True,
+                null=True,
+                verbose_name='Дата последнего комментария',
+            ),
+        ),
+        migrations.RunPython(
+            fill_comment_counters, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-17 06:57
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_deletionjob_pending_delete'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(
+                django.db.models.functions.text.Lower('username'),
+                name='user_username_lower',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(
+                django.db.models.functions.text.Lower('email'),
+                name='user_email_lower',
+            ),
+        ),
+    ]
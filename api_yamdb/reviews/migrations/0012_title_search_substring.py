@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Поиск по подстроке названия и описания (reviews/search.py): icontains
+# в PostgreSQL сравнивает UPPER(поле), поэтому триграммные индексы
+# строятся по тем же выражениям
+FORWARD = (
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_upper_trgm '
+    'ON reviews_title USING gin (UPPER(name) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS reviews_title_description_upper_trgm '
+    'ON reviews_title USING gin (UPPER(description) gin_trgm_ops)',
+    'DROP INDEX IF EXISTS reviews_title_name_trgm',
+)
+BACKWARD = (
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_trgm '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+    'DROP INDEX IF EXISTS reviews_title_description_upper_trgm',
+    'DROP INDEX IF EXISTS reviews_title_name_upper_trgm',
+)
+
+
+def execute(schema_editor, statements):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def forward(apps, schema_editor):
+    execute(schema_editor, FORWARD)
+
+
+def backward(apps, schema_editor):
+    execute(schema_editor, BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_review_comment_pub_date_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
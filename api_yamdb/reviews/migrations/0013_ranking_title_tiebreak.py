@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0012_title_search_substring'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='titleranking',
+            name='ranking_by_rating',
+        ),
+        migrations.RemoveIndex(
+            model_name='titleranking',
+            name='ranking_by_reviews',
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(
+                fields=['scope', '-rating', '-reviews_count', 'title'],
+                name='ranking_by_rating',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(
+                fields=['scope', '-reviews_count', '-rating', 'title'],
+                name='ranking_by_reviews',
+            ),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Поиск по началу имени и почты (api/filters.py PrefixSearchFilter)
+# в PostgreSQL сравнивает lower(поле) COLLATE "C"; индексы с прежними
+# именами пересоздаются по тому же выражению
+FIELDS = (('user_username_lower', 'username'), ('user_email_lower', 'email'))
+
+
+def rebuild(schema_editor, collate):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, field in FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}', params=None)
+        schema_editor.execute(
+            f'CREATE INDEX {name} ON reviews_user '
+            f'((LOWER({field}){collate}))',
+            params=None,
+        )
+
+
+def forward(apps, schema_editor):
+    rebuild(schema_editor, ' COLLATE "C"')
+
+
+def backward(apps, schema_editor):
+    rebuild(schema_editor, '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_tombstone_deleted_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
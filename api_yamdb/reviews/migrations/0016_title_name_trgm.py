@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Поиск по названию с опечатками (reviews/search.py): name % term
+# в PostgreSQL обслуживает триграммный индекс по самому полю, который
+# удалила 0012
+FORWARD = (
+    'CREATE INDEX IF NOT EXISTS reviews_title_name_trgm '
+    'ON reviews_title USING gin (name gin_trgm_ops)',
+)
+BACKWARD = ('DROP INDEX IF EXISTS reviews_title_name_trgm',)
+
+
+def execute(schema_editor, statements):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def forward(apps, schema_editor):
+    execute(schema_editor, FORWARD)
+
+
+def backward(apps, schema_editor):
+    execute(schema_editor, BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_user_lower_c_collation'),
+    ]
+
+    operations = [
+        migrations.RunPython(forward, backward),
+    ]
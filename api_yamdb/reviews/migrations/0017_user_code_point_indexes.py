@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-17 08:00
+
+import django.db.models.functions.text
+import reviews.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_title_name_trgm'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_username_lower',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_email_lower',
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(
+                reviews.expressions.CodePointCollate(
+                    django.db.models.functions.text.Lower('username')
+                ),
+                name='user_username_lower',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(
+                reviews.expressions.CodePointCollate(
+                    django.db.models.functions.text.Lower('email')
+                ),
+                name='user_email_lower',
+            ),
+        ),
+    ]
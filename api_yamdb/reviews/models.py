@@ -1,7 +1,12 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import (MaxLengthValidator, MaxValueValidator,
                                     MinValueValidator, validate_slug)
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .expressions import CodePointCollate
 
 
 class User(AbstractUser):
@@ -19,8 +24,21 @@ class User(AbstractUser):
         null=True,
     )
     role = models.CharField(max_length=9, choices=ROLE_CHOICES, default='user')
+    # Удаление поставлено в очередь (reviews/deletion.py), объект
+    # уже не показывается
+    pending_delete = models.BooleanField(default=False, editable=False)
 
     class Meta:
+        # Поиск пользователей по началу имени или почты (PrefixSearchFilter)
+        indexes = [
+            models.Index(
+                CodePointCollate(Lower('username')),
+                name='user_username_lower',
+            ),
+            models.Index(
+                CodePointCollate(Lower('email')), name='user_email_lower'
+            ),
+        ]
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
 
@@ -37,6 +55,7 @@ class Category(models.Model):
         max_length=50,
         validators=[validate_slug, MaxLengthValidator(limit_value=50)],
     )
+    pending_delete = models.BooleanField(default=False, editable=False)
 
     class Meta:
         verbose_name = 'Категория'
@@ -80,11 +99,20 @@ class Title(models.Model):
         blank=True, null=True, verbose_name='Год выпуска'
     )
     rating = models.FloatField(blank=True, null=True)
+    reviews_count = models.PositiveIntegerField(
+        default=0, verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0, verbose_name='Сумма оценок'
+    )
     description = models.CharField(max_length=200, verbose_name='Описание')
     genre = models.ManyToManyField(Genre, through='GenreTitle', blank=True)
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, related_name='titles', null=True
     )
+    # Заполняется триггером БД (миграция 0003), см. reviews/search.py
+    search_vector = SearchVectorField(null=True, editable=False)
+    pending_delete = models.BooleanField(default=False, editable=False)
 
     class Meta:
         verbose_name = 'Произведение'
@@ -131,6 +159,13 @@ class Review(models.Model):
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0, verbose_name='Количество комментариев'
+    )
+    last_comment_at = models.DateTimeField(
+        'Дата последнего комментария', blank=True, null=True
+    )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
         constraints = [
@@ -138,10 +173,86 @@ class Review(models.Model):
                 fields=['title', 'author'], name='unique_title_author'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['title', 'updated_at'], name='review_title_updated'
+            ),
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date',
+            ),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ('-id',)
 
+    def save(self, *args, **kwargs):
+        # Рейтинг произведения обновляется в той же транзакции
+        # (см. reviews/signals.py)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class TitleScore(models.Model):
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='score_counts'
+    )
+    score = models.SmallIntegerField(
+        validators=[MaxValueValidator(10), MinValueValidator(1)]
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'], name='unique_title_score'
+            )
+        ]
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+        ordering = ('title', 'score')
+
+
+class TitleRanking(models.Model):
+    # Материализованный рейтинг: строка на каждую область (все
+    # произведения, категория, жанр), в которую входит оценённое
+    # произведение.
+    SCOPE_ALL = 'all'
+
+    scope = models.CharField(max_length=64)
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='rankings'
+    )
+    rating = models.FloatField(null=True)
+    reviews_count = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'title'], name='unique_scope_title'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['scope', '-rating', '-reviews_count', 'title'],
+                name='ranking_by_rating',
+            ),
+            models.Index(
+                fields=['scope', '-reviews_count', '-rating', 'title'],
+                name='ranking_by_reviews',
+            ),
+        ]
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+
+    @staticmethod
+    def category_scope(category_id):
+        return f'category:{category_id}'
+
+    @staticmethod
+    def genre_scope(genre_id):
+        return f'genre:{genre_id}'
+
 
 class Comment(models.Model):
     author = models.ForeignKey(
@@ -154,8 +265,94 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=['review', 'updated_at'], name='comment_review_updated'
+            ),
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date',
+            ),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-id',)
+
+    def save(self, *args, **kwargs):
+        # Счётчик комментариев отзыва обновляется в той же транзакции;
+        # во внешней транзакции точка сохранения не нужна
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class Tombstone(models.Model):
+    # Запись об удалённом отзыве или комментарии для ленты изменений
+    # (?since=): parent_id - произведение отзыва или отзыв комментария.
+    model = models.CharField(max_length=32)
+    object_id = models.PositiveIntegerField()
+    parent_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['model', 'parent_id', 'deleted_at'],
+                name='tombstone_parent_deleted',
+            ),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted'),
+        ]
+        verbose_name = 'Удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+
+
+class DeletionJob(models.Model):
+    # Фоновое удаление произведения, категории или пользователя вместе
+    # с зависимыми строками (manage.py process_deletions).
+    model = models.CharField(max_length=32)
+    object_id = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(finished_at__isnull=True),
+                name='deletion_job_pending',
+            )
+        ]
+        verbose_name = 'Фоновое удаление'
+        verbose_name_plural = 'Фоновые удаления'
+        ordering = ('-id',)
+
+
+class OutgoingEmail(models.Model):
+    # Очередь писем: запрос только сохраняет письмо, а отправляет его
+    # отдельный процесс (manage.py send_emails).
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField(max_length=254)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(sent_at__isnull=True),
+                name='outgoing_email_pending',
+            )
+        ]
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('-id',)
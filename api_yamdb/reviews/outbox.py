@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def pending_emails():
+    return OutgoingEmail.objects.filter(
+        sent_at__isnull=True,
+        attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def queue_depth():
+    now = timezone.now()
+    pending = pending_emails()
+    return {
+        'pending': pending.count(),
+        'ready': pending.filter(next_attempt_at__lte=now).count(),
+        'failed': OutgoingEmail.objects.filter(
+            sent_at__isnull=True,
+            attempts__gte=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        ).count(),
+    }
+
+
+def retry_delay(attempts):
+    # Экспоненциальная задержка: 1, 2, 4, ... базовых интервалов
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size):
+    # Письма «арендуются» сдвигом next_attempt_at, чтобы параллельные
+    # обработчики не взяли их повторно, а блокировка не держалась на
+    # время SMTP-сессии.
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            pending_emails()
+            .filter(next_attempt_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            id__in=[email.id for email in batch]
+        ).update(
+            next_attempt_at=now
+            + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        )
+    return batch
+
+
+def deliver_batch(batch_size=None, connection=None):
+    batch = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+    sent, failed = [], []
+    # Одно SMTP-соединение на всю пачку
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in batch:
+            email.last_error = str(error)
+        failed = batch
+    else:
+        try:
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email,
+                    to=[email.recipient],
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    email.last_error = str(error)
+                    failed.append(email)
+                else:
+                    sent.append(email)
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    OutgoingEmail.objects.filter(id__in=[email.id for email in sent]).update(
+        sent_at=now, last_error=''
+    )
+    for email in failed:
+        email.attempts += 1
+        email.next_attempt_at = now + retry_delay(email.attempts)
+    OutgoingEmail.objects.bulk_update(
+        failed, ['attempts', 'next_attempt_at', 'last_error']
+    )
+    return len(sent), len(failed)
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from .models import GenreTitle, Title, TitleRanking
+
+
+def _title_scopes(category_id, genre_ids):
+    scopes = [TitleRanking.SCOPE_ALL]
+    if category_id is not None:
+        scopes.append(TitleRanking.category_scope(category_id))
+    scopes.extend(TitleRanking.genre_scope(genre_id) for genre_id in genre_ids)
+    return scopes
+
+
+def _ranking_rows(title_id, rating, reviews_count, scopes):
+    return [
+        TitleRanking(
+            scope=scope,
+            title_id=title_id,
+            rating=rating,
+            reviews_count=reviews_count,
+        )
+        for scope in dict.fromkeys(scopes)
+    ]
+
+
+def refresh_title_ranking(title_id):
+    # Полная пересборка строк произведения: нужна при смене категории
+    # или жанров.
+    TitleRanking.objects.filter(title_id=title_id).delete()
+    title = (
+        Title.objects.filter(pk=title_id, reviews_count__gt=0)
+        .values('rating', 'reviews_count', 'category_id')
+        .first()
+    )
+    if title is None:
+        return
+    genre_ids = GenreTitle.objects.filter(
+        title_id=title_id, genre__isnull=False
+    ).values_list('genre_id', flat=True)
+    TitleRanking.objects.bulk_create(
+        _ranking_rows(
+            title_id,
+            title['rating'],
+            title['reviews_count'],
+            _title_scopes(title['category_id'], genre_ids),
+        )
+    )
+
+
+def update_title_ranking(title_id, count_delta):
+    # После записи отзыва области не меняются - достаточно обновить
+    # значения одним запросом.
+    title = Title.objects.filter(pk=OuterRef('title_id'))
+    updated = TitleRanking.objects.filter(title_id=title_id).update(
+        rating=Subquery(title.values('rating')),
+        reviews_count=Subquery(title.values('reviews_count')),
+    )
+    if not updated:
+        refresh_title_ranking(title_id)
+    elif count_delta < 0:
+        TitleRanking.objects.filter(
+            title_id=title_id, reviews_count=0
+        ).delete()
+
+
+def remove_scope(scope):
+    TitleRanking.objects.filter(scope=scope).delete()
+
+
+def rebuild_rankings():
+    TitleRanking.objects.all().delete()
+    titles = (
+        Title.objects.filter(reviews_count__gt=0)
+        .order_by('pk')
+        .prefetch_related('genre')
+    )
+    last_pk = 0
+    while True:
+        chunk = list(
+            titles.filter(pk__gt=last_pk)[: settings.BULK_BATCH_SIZE]
+        )
+        if not chunk:
+            return
+        TitleRanking.objects.bulk_create(
+            row
+            for title in chunk
+            for row in _ranking_rows(
+                title.pk,
+                title.rating,
+                title.reviews_count,
+                _title_scopes(
+                    title.category_id,
+                    [genre.pk for genre in title.genre.all()],
+                ),
+            )
+        )
+        last_pk = chunk[-1].pk
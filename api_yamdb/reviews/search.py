@@ -0,0 +1,129 @@
+import re
+
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'simple'
+TRIGRAM_MIN_LENGTH = 3
+# Порог pg_trgm.similarity_threshold по умолчанию
+TRIGRAM_SIMILARITY = 0.3
+FTS_TABLE = 'reviews_title_fts'
+
+# Схема поиска (триггеры, индексы, FTS5-таблица для SQLite) создаётся
+# миграциями 0003, 0009, 0012 и 0016; здесь только пересчёт индекса
+POSTGRES_REBUILD = (
+    # Пустое обновление name запускает триггер для каждой строки
+    'UPDATE reviews_title SET name = name',
+)
+SQLITE_REBUILD = (f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",)
+
+
+def rebuild_search_index(using_connection=connection):
+    vendor = using_connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_REBUILD
+    elif vendor == 'sqlite':
+        statements = SQLITE_REBUILD
+    else:
+        return
+    with using_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def trigrams(text):
+    # Как в pg_trgm: слова в нижнем регистре, дополненные двумя
+    # пробелами в начале и одним в конце
+    grams = set()
+    for word in re.findall(r'\w+', text.lower()):
+        word = f'  {word} '
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def similarity(first, second):
+    first, second = trigrams(first), trigrams(second)
+    if not first or not second:
+        return 0
+    return len(first & second) / len(first | second)
+
+
+def _contains(term):
+    # Подстрока названия или описания без учёта регистра: так же ищет
+    # триграммный токенизатор FTS5 в SQLite
+    return Q(name__icontains=term) | Q(description__icontains=term)
+
+
+def _search_postgres(queryset, term):
+    # Подстрока, слова или похожее название (опечатки, порог pg_trgm);
+    # порядок - по словам и похожести названия
+    query = SearchQuery(term, config=SEARCH_CONFIG, search_type='websearch')
+    return (
+        queryset.filter(
+            _contains(term)
+            | Q(search_vector=query)
+            | Q(name__trigram_similar=term)
+        )
+        .annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+            + TrigramSimilarity('name', term)
+        )
+        .order_by('-search_rank', '-id')
+    )
+
+
+def _search_sqlite(queryset, term):
+    match = '"{}"'.format(term.replace('"', '""'))
+    matches = RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        (match,),
+    )
+    rank = RawSQL(
+        f'SELECT -rank FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND rowid = reviews_title.id',
+        (match,),
+    )
+    return (
+        queryset.filter(
+            Q(pk__in=matches) | Q(pk__in=_similar_sqlite(term))
+        )
+        .annotate(search_rank=rank)
+        .order_by('-search_rank', '-id')
+    )
+
+
+def _similar_sqlite(term):
+    # Опечатки: кандидаты - названия с любой триграммой запроса из FTS5,
+    # отбор по той же похожести, что name % term в PostgreSQL
+    grams = {gram for gram in trigrams(term) if ' ' not in gram}
+    if not grams:
+        return []
+    match = ' OR '.join(
+        '"{}"'.format(gram.replace('"', '""')) for gram in sorted(grams)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, name FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s',
+            (f'name : ({match})',),
+        )
+        return [
+            pk
+            for pk, name in cursor.fetchall()
+            if similarity(name, term) >= TRIGRAM_SIMILARITY
+        ]
+
+
+def search_titles(queryset, term):
+    term = term.strip()
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, term)
+    if vendor == 'sqlite' and len(term) >= TRIGRAM_MIN_LENGTH:
+        return _search_sqlite(queryset, term)
+    # Триграммам нужно не меньше трёх символов. SQLite сравнивает
+    # без учёта регистра только латиницу
+    return queryset.filter(_contains(term))
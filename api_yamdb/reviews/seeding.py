@@ -0,0 +1,159 @@
+import random
+from io import StringIO
+from itertools import islice
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .rankings import rebuild_rankings
+from .versions import bump_version
+
+CATEGORIES = 10
+GENRES = 20
+GENRES_PER_TITLE = 3
+WORDS = (
+    'время',
+    'дорога',
+    'свет',
+    'город',
+    'море',
+    'ночь',
+    'война',
+    'мир',
+    'звезда',
+    'дом',
+    'песня',
+    'тайна',
+    'сердце',
+    'река',
+    'зима',
+    'лето',
+)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _create(model, objects):
+    # Вставка пачками фиксированного размера: память не растёт с объёмом.
+    # Не все СУБД возвращают id из bulk_create, поэтому новые id
+    # возвращаются диапазоном range(первый, последний + 1): seed()
+    # вставляет всё в одной транзакции, и id идут подряд.
+    last_pk = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, settings.BULK_BATCH_SIZE))
+        if not batch:
+            break
+        model.objects.bulk_create(batch)
+    bounds = model.objects.filter(pk__gt=last_pk).aggregate(
+        first=Min('pk'), last=Max('pk'), count=Count('pk')
+    )
+    if not bounds['count']:
+        return range(0)
+    ids = range(bounds['first'], bounds['last'] + 1)
+    if len(ids) != bounds['count']:
+        raise RuntimeError(
+            f'{model.__name__}: id новых строк идут не подряд, '
+            'похоже, таблицу одновременно заполняет другой процесс'
+        )
+    return ids
+
+
+def refresh_aggregates():
+    # bulk_create не вызывает сигналы: пересчитываем всё, что обычно
+    # обновляется инкрементально.
+    call_command('recalculate_ratings', stdout=StringIO())
+    call_command('recount_comments', stdout=StringIO())
+    with transaction.atomic():
+        rebuild_rankings()
+    bump_version(Title, Category, Genre, GenreTitle)
+
+
+def seed(titles, reviews, comments, seed=0):
+    # Данные полностью определяются параметрами и seed. Отзывы
+    # распределяются по произведениям по кругу, авторов создаётся
+    # столько, сколько нужно для уникальности пары (произведение, автор).
+    rng = random.Random(seed)
+    prefix = f'seed{seed}'
+    with transaction.atomic():
+        users_count = max(1, -(-reviews // max(titles, 1)))
+        user_ids = _create(
+            User,
+            (
+                User(
+                    username=f'{prefix}_user_{number}',
+                    email=f'{prefix}_user_{number}@yamdb.fake',
+                )
+                for number in range(users_count)
+            ),
+        )
+        category_ids = _create(
+            Category,
+            (
+                Category(
+                    name=f'Категория {prefix}-{number}',
+                    slug=f'{prefix}-c{number}',
+                )
+                for number in range(CATEGORIES)
+            ),
+        )
+        genre_ids = _create(
+            Genre,
+            (
+                Genre(
+                    name=f'Жанр {prefix}-{number}',
+                    slug=f'{prefix}-g{number}',
+                )
+                for number in range(GENRES)
+            ),
+        )
+        title_ids = _create(
+            Title,
+            (
+                Title(
+                    name=f'{_text(rng, 2)} {prefix}-{number}',
+                    year=rng.randint(1900, 2023),
+                    description=_text(rng, 8),
+                    category_id=rng.choice(category_ids),
+                )
+                for number in range(titles)
+            ),
+        )
+        _create(
+            GenreTitle,
+            (
+                GenreTitle(title_id=title_id, genre_id=genre_id)
+                for title_id in title_ids
+                for genre_id in rng.sample(genre_ids, GENRES_PER_TITLE)
+            ),
+        )
+        review_ids = _create(
+            Review,
+            (
+                Review(
+                    title_id=title_ids[number % titles],
+                    author_id=user_ids[number // titles],
+                    text=_text(rng, 20),
+                    score=rng.randint(1, 10),
+                )
+                for number in range(reviews if title_ids else 0)
+            ),
+        )
+        if review_ids:
+            _create(
+                Comment,
+                (
+                    Comment(
+                        review_id=review_ids[number % len(review_ids)],
+                        author_id=user_ids[number % users_count],
+                        text=_text(rng, 10),
+                    )
+                    for number in range(comments)
+                ),
+            )
+    refresh_aggregates()
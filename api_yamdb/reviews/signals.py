@@ -0,0 +1,370 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (Avg, Case, Count, F, FloatField, OuterRef,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce, Greatest
+from django.db.models.signals import (m2m_changed, post_delete, post_init,
+                                      post_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .identity import forget_users
+from .models import (Category, Comment, Genre, GenreTitle, Review, Title,
+                     TitleRanking, TitleScore, Tombstone, User)
+from .rankings import refresh_title_ranking, remove_scope, update_title_ranking
+from .versions import bump_scoped_version, bump_scoped_versions, bump_version
+
+
+def update_title_rating(title_id, count_delta, score_delta):
+    reviews_count = F('reviews_count') + count_delta
+    score_sum = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        reviews_count=reviews_count,
+        score_sum=score_sum,
+        rating=Case(
+            When(reviews_count__lte=-count_delta, then=Value(None)),
+            default=Cast(score_sum, FloatField()) / reviews_count,
+            output_field=FloatField(),
+        ),
+    )
+    update_title_ranking(title_id, count_delta)
+    bump_version(Title)
+
+
+def update_title_score(title_id, score, delta):
+    scores = TitleScore.objects.filter(title_id=title_id, score=score)
+    if scores.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            TitleScore.objects.create(
+                title_id=title_id, score=score, count=delta
+            )
+    except IntegrityError:
+        # Строку успел создать параллельный запрос
+        scores.update(count=F('count') + delta)
+
+
+def title_reviews_subquery(aggregate):
+    reviews = (
+        Review.objects.filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+    return Subquery(reviews)
+
+
+def recalculate_title_ratings(title_ids=None):
+    # Рейтинг и распределение оценок заново по отзывам: всех
+    # произведений или только перечисленных
+    titles = Title.objects.all()
+    scores = TitleScore.objects.all()
+    reviews = Review.objects.order_by()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+        scores = scores.filter(title_id__in=title_ids)
+        reviews = reviews.filter(title_id__in=title_ids)
+    scores.delete()
+    TitleScore.objects.bulk_create(
+        (
+            TitleScore(**row)
+            for row in reviews.values('title_id', 'score')
+            .annotate(count=Count('id'))
+            .iterator()
+        ),
+        batch_size=settings.BULK_BATCH_SIZE,
+    )
+    bump_version(Title)
+    return titles.update(
+        reviews_count=Coalesce(title_reviews_subquery(Count('id')), 0),
+        score_sum=Coalesce(title_reviews_subquery(Sum('score')), 0),
+        rating=title_reviews_subquery(Avg('score')),
+    )
+
+
+@receiver(post_init, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    instance._initial_title_id = instance.title_id
+    instance._initial_score = instance.score
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    if created:
+        update_title_rating(instance.title_id, 1, instance.score)
+        update_title_score(instance.title_id, instance.score, 1)
+    elif instance._initial_title_id != instance.title_id:
+        update_title_rating(
+            instance._initial_title_id, -1, -instance._initial_score
+        )
+        update_title_rating(instance.title_id, 1, instance.score)
+        update_title_score(
+            instance._initial_title_id, instance._initial_score, -1
+        )
+        update_title_score(instance.title_id, instance.score, 1)
+        bump_scoped_version(Review, instance._initial_title_id)
+    elif instance._initial_score != instance.score:
+        update_title_rating(
+            instance.title_id, 0, instance.score - instance._initial_score
+        )
+        update_title_score(instance.title_id, instance._initial_score, -1)
+        update_title_score(instance.title_id, instance.score, 1)
+    remember_review_score(sender, instance)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    deleted = deleted_rows()
+    if deleted is not None:
+        # Рейтинги, надгробия и версии обновит batch_deletes
+        deleted['reviews'].append((instance.pk, instance.title_id))
+        return
+    update_title_rating(instance.title_id, -1, -instance._initial_score)
+    update_title_score(instance.title_id, instance._initial_score, -1)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def bump_catalog_version(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres_version(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version(GenreTitle)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_title_reviews_version(sender, instance, **kwargs):
+    if 'created' not in kwargs and deleted_rows() is not None:
+        return
+    bump_scoped_version(Review, instance.title_id)
+
+
+@receiver(post_delete, sender=Title)
+def bump_deleted_title_reviews_version(sender, instance, **kwargs):
+    bump_scoped_version(Review, instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def bump_deleted_review_comments_version(sender, instance, **kwargs):
+    if deleted_rows() is not None:
+        return
+    bump_scoped_version(Comment, instance.pk)
+
+
+def latest_comment_subquery():
+    return Subquery(
+        Comment.objects.filter(review=OuterRef('pk'))
+        .order_by('-pub_date')
+        .values('pub_date')[:1]
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_counter_on_save(sender, instance, created, **kwargs):
+    if not created:
+        return
+    reviews = Review.objects.filter(pk=instance.review_id)
+    reviews.update(
+        comment_count=F('comment_count') + 1,
+        updated_at=timezone.now(),
+        last_comment_at=Greatest(
+            Coalesce('last_comment_at', Value(instance.pub_date)),
+            Value(instance.pub_date),
+        ),
+    )
+    bump_comment_versions(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_counter_on_delete(sender, instance, **kwargs):
+    deleted = deleted_rows()
+    if deleted is not None:
+        # Счётчики, надгробия и версии обновит batch_deletes
+        deleted['comments'].append((instance.pk, instance.review_id))
+        return
+    reviews = Review.objects.filter(pk=instance.review_id)
+    reviews.update(
+        comment_count=F('comment_count') - 1,
+        updated_at=timezone.now(),
+        last_comment_at=latest_comment_subquery(),
+    )
+    bump_comment_versions(instance)
+
+
+@receiver(post_delete, sender=Review)
+def record_review_tombstone(sender, instance, **kwargs):
+    if deleted_rows() is not None:
+        return
+    Tombstone.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        parent_id=instance.title_id,
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def record_comment_tombstone(sender, instance, **kwargs):
+    if deleted_rows() is not None:
+        return
+    Tombstone.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        parent_id=instance.review_id,
+    )
+
+
+@receiver(post_save, sender=Comment)
+def bump_edited_comment_version(sender, instance, created, **kwargs):
+    if not created:
+        bump_scoped_version(Comment, instance.review_id)
+
+
+def bump_comment_versions(comment):
+    bump_scoped_version(Comment, comment.review_id)
+    # Счётчик комментариев виден в списке отзывов произведения. Вьюха
+    # передаёт уже загруженный отзыв, поэтому title_id есть без запроса
+    if Comment.review.is_cached(comment):
+        title_id = comment.review.title_id
+    else:
+        title_id = (
+            Review.objects.filter(pk=comment.review_id)
+            .values_list('title_id', flat=True)
+            .first()
+        )
+    if title_id is not None:
+        bump_scoped_version(Review, title_id)
+
+
+_batch = local()
+
+
+def deleted_rows():
+    return getattr(_batch, 'rows', None)
+
+
+@contextmanager
+def batch_deletes():
+    # Каскадное удаление произведений, отзывов и пользователей уносит
+    # их отзывы и комментарии. Внутри блока сигналы удаления только
+    # копят (id, id родителя), а после удаления надгробия, счётчики
+    # комментариев, рейтинги и версии обновляются один раз на отзыв
+    # или произведение, а не на каждую удалённую строку.
+    if deleted_rows() is not None:
+        yield
+        return
+    _batch.rows = {'comments': [], 'reviews': []}
+    try:
+        yield
+        rows = _batch.rows
+    finally:
+        _batch.rows = None
+    if rows['comments']:
+        flush_comment_deletes(rows['comments'])
+    if rows['reviews']:
+        flush_review_deletes(rows['reviews'])
+
+
+def record_tombstones(model, rows):
+    Tombstone.objects.bulk_create(
+        Tombstone(
+            model=model._meta.model_name,
+            object_id=object_id,
+            parent_id=parent_id,
+        )
+        for object_id, parent_id in rows
+    )
+
+
+def flush_comment_deletes(comments):
+    record_tombstones(Comment, comments)
+    review_ids = {review_id for _, review_id in comments}
+    reviews = Review.objects.filter(pk__in=review_ids)
+    reviews.update(
+        comment_count=Coalesce(
+            Subquery(
+                Comment.objects.filter(review=OuterRef('pk'))
+                .order_by()
+                .values('review')
+                .annotate(count=Count('pk'))
+                .values('count')
+            ),
+            0,
+        ),
+        updated_at=timezone.now(),
+        last_comment_at=latest_comment_subquery(),
+    )
+    bump_scoped_versions(Comment, review_ids)
+    bump_scoped_versions(
+        Review, set(reviews.values_list('title_id', flat=True))
+    )
+
+
+def flush_review_deletes(reviews):
+    record_tombstones(Review, reviews)
+    title_ids = {title_id for _, title_id in reviews}
+    recalculate_title_ratings(title_ids)
+    for title_id in title_ids:
+        refresh_title_ranking(title_id)
+    bump_scoped_versions(Comment, {review_id for review_id, _ in reviews})
+    bump_scoped_versions(Review, title_ids)
+
+
+@receiver(post_save, sender=Title)
+def refresh_ranking_on_title_save(sender, instance, created, **kwargs):
+    if not created:
+        refresh_title_ranking(instance.pk)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def refresh_ranking_on_genre_change(sender, instance, **kwargs):
+    if instance.title_id is not None:
+        refresh_title_ranking(instance.title_id)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_ranking_on_genres_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        refresh_title_ranking(instance.pk)
+        return
+    if pk_set is None:
+        # post_clear со стороны жанра: состав уже неизвестен
+        remove_scope(TitleRanking.genre_scope(instance.pk))
+        return
+    for title_id in pk_set:
+        refresh_title_ranking(title_id)
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_ranking(sender, instance, **kwargs):
+    remove_scope(TitleRanking.category_scope(instance.pk))
+
+
+@receiver(post_delete, sender=Genre)
+def remove_genre_ranking(sender, instance, **kwargs):
+    remove_scope(TitleRanking.genre_scope(instance.pk))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_users(instance.pk)
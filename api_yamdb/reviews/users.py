@@ -0,0 +1,60 @@
+from django.db import transaction
+
+from .deletion import schedule_deletions
+from .identity import forget_users
+from .models import User
+
+USER_OPERATIONS = ('set_role', 'activate', 'deactivate', 'delete')
+
+
+def operation_changes(operation, role=None):
+    if operation == 'set_role':
+        return {'role': role}
+    if operation == 'delete':
+        return {}
+    return {'is_active': operation == 'activate'}
+
+
+def bulk_user_operation(usernames, operation, role=None, actor=None):
+    # Одна выборка и одно обновление (или постановка в очередь
+    # удаления) на всех пользователей в одной транзакции. Возвращает
+    # статус для каждого имени в порядке запроса.
+    usernames = list(dict.fromkeys(usernames))
+    changes = operation_changes(operation, role)
+    with transaction.atomic():
+        users = {
+            user.username: user
+            for user in User.objects.filter(
+                username__in=usernames, pending_delete=False
+            )
+            .select_for_update()
+            .only('id', 'username', 'role', 'is_active')
+        }
+        results, ids = {}, []
+        for username in usernames:
+            user = users.get(username)
+            if user is None:
+                results[username] = 'not_found'
+            elif actor is not None and user.pk == actor.pk:
+                # Администратор не может пакетно лишить прав себя
+                results[username] = 'forbidden'
+            elif changes and all(
+                getattr(user, field) == value
+                for field, value in changes.items()
+            ):
+                results[username] = 'unchanged'
+            else:
+                ids.append(user.pk)
+                results[username] = (
+                    'scheduled' if operation == 'delete' else 'updated'
+                )
+        if ids and operation == 'delete':
+            schedule_deletions(User, ids)
+        elif ids:
+            User.objects.filter(pk__in=ids).update(**changes)
+    if ids and operation != 'delete':
+        # update() не вызывает сигналов, поэтому кэш сбрасывается здесь,
+        # уже после фиксации: иначе другой процесс мог бы снова положить
+        # в общий кэш строку до изменения
+        forget_users(*ids)
+    return results
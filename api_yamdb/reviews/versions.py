@@ -0,0 +1,66 @@
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'yamdb:version:{}'
+
+
+def _version_key(model, scope=None):
+    key = VERSION_KEY.format(model._meta.label_lower)
+    if scope is None:
+        return key
+    return f'{key}:{scope}'
+
+
+def _now():
+    # Версия - это время последнего изменения в миллисекундах: так она
+    # не повторяется после вытеснения из кэша.
+    return int(time.time() * 1000)
+
+
+def _get_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _now(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def _bump(keys):
+    versions = cache.get_many(keys)
+    cache.set_many(
+        {key: max(_now(), versions.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def _bump_on_commit(keys):
+    # Повторное обновление после коммита не даёт закэшировать данные,
+    # прочитанные другим запросом до окончания транзакции.
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
+
+
+def get_versions(*models):
+    return _get_versions([_version_key(model) for model in models])
+
+
+def bump_version(*models):
+    _bump_on_commit([_version_key(model) for model in models])
+
+
+def get_scoped_version(model, scope):
+    return _get_versions([_version_key(model, scope)])[0]
+
+
+def bump_scoped_version(model, scope):
+    _bump_on_commit([_version_key(model, scope)])
+
+
+def bump_scoped_versions(model, scopes):
+    # Несколько областей одной модели за одно обращение к кэшу
+    keys = [_version_key(model, scope) for scope in scopes]
+    if keys:
+        _bump_on_commit(keys)
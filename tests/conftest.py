@@ -1,8 +1,122 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = []
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', password='1234567'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUserAnother',
+        email='testuseranother@yamdb.fake',
+        password='1234567',
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin',
+        email='testadmin@yamdb.fake',
+        password='1234567',
+        role='admin',
+    )
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genre():
+    from reviews.models import Genre
+
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+@pytest.fixture
+def title(category, genre):
+    from reviews.models import Title
+
+    title = Title.objects.create(
+        name='Побег из Шоушенка',
+        year=1994,
+        description='Фильм',
+        category=category,
+    )
+    title.genre.add(genre)
+    return title
+
+
+def get_client(user=None):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    client = APIClient()
+    if user is not None:
+        token = AccessToken.for_user(user)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    return get_client(user)
+
+
+@pytest.fixture
+def admin_client(admin):
+    return get_client(admin)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    from reviews.catalog import reset_catalogs
+
+    cache.clear()
+    reset_catalogs()
+
+
+@pytest.fixture
+def query_budget(settings):
+    # Использование:
+    #     with query_budget('GET reviews-list'):
+    #         client.get(...)
+    # Бюджет берётся из settings.QUERY_BUDGETS (или передаётся числом);
+    # повторяющиеся запросы (N+1) считаются ошибкой.
+    from contextlib import contextmanager
+
+    from api.middleware import QueryRecorder
+
+    @contextmanager
+    def check(endpoint):
+        budget = settings.QUERY_BUDGETS.get(endpoint, endpoint)
+        with QueryRecorder() as recorder:
+            yield recorder
+        queries = '\n'.join(sql for sql, _ in recorder.queries)
+        assert recorder.count <= budget, (
+            f'{endpoint}: {recorder.count} запросов при бюджете {budget}:\n'
+            f'{queries}'
+        )
+        assert not recorder.duplicates, (
+            f'{endpoint}: повторяющиеся запросы (N+1): {recorder.duplicates}'
+        )
+
+    return check
@@ -0,0 +1,227 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from reviews.deletion import failed_jobs, retry_jobs
+from reviews.models import (Category, Comment, DeletionJob, Review, Title,
+                            TitleRanking, TitleScore, Tombstone)
+
+from .conftest import get_client
+
+
+def process_deletions():
+    call_command('process_deletions', once=True, batch_size=2, stdout=StringIO())
+
+
+@pytest.fixture
+def authors(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'user{number}', email=f'user{number}@yamdb.fake'
+        )
+        for number in range(4)
+    ]
+
+
+@pytest.mark.django_db
+class TestBackgroundDeletion:
+    def test_title_hidden_then_deleted(
+        self, admin_client, client, title, authors
+    ):
+        for number, author in enumerate(authors):
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=number + 1
+            )
+            for commenter in authors[:3]:
+                Comment.objects.create(
+                    review=review, author=commenter, text='Комментарий'
+                )
+        url = f'/api/v1/titles/{title.id}/'
+        response = admin_client.delete(f'{url}?background=true')
+        assert response.status_code == 202
+        assert response.json()['status'] == 'pending'
+        assert Title.objects.filter(pk=title.pk).exists(), (
+            'Проверьте, что запрос не удаляет отзывы и комментарии сам'
+        )
+
+        assert client.get(url).status_code == 404
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        assert client.get('/api/v1/titles/leaderboard/').json() == []
+        assert client.get(f'{url}reviews/').json()['count'] == 0
+        assert admin_client.delete(url).status_code == 404
+
+        process_deletions()
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists()
+        assert not TitleRanking.objects.exists()
+        assert DeletionJob.objects.get().finished_at is not None
+
+    def test_user_deletion_keeps_aggregates(
+        self, admin_client, title, category, authors
+    ):
+        other = Title.objects.create(
+            name='Другое', description='Фильм', category=category
+        )
+        victim, *rest = authors
+        for current in (title, other):
+            Review.objects.create(
+                title=current, author=victim, text='Отзыв', score=10
+            )
+            kept = Review.objects.create(
+                title=current, author=rest[0], text='Отзыв', score=4
+            )
+            Comment.objects.create(review=kept, author=victim, text='1')
+            Comment.objects.create(review=kept, author=rest[1], text='2')
+        victim_client = get_client(victim)
+
+        response = admin_client.delete(
+            f'/api/v1/users/{victim.username}/?background=true'
+        )
+        assert response.status_code == 202
+        assert victim_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что удаляемый пользователь сразу теряет доступ'
+        )
+        usernames = {
+            user['username']
+            for user in admin_client.get('/api/v1/users/').json()['results']
+        }
+        assert victim.username not in usernames
+
+        process_deletions()
+        assert not type(victim).objects.filter(pk=victim.pk).exists()
+        for current in (title, other):
+            current.refresh_from_db()
+            assert current.reviews_count == 1
+            assert current.rating == 4
+        for review in Review.objects.all():
+            assert review.comment_count == 1
+        assert set(
+            TitleRanking.objects.values_list('reviews_count', flat=True)
+        ) == {1}
+
+    def test_sync_user_deletion_keeps_aggregates(
+        self, admin_client, title, authors
+    ):
+        victim, kept_author, *_ = authors
+        Review.objects.create(
+            title=title, author=victim, text='Отзыв', score=10
+        )
+        Review.objects.create(
+            title=title, author=kept_author, text='Отзыв', score=4
+        )
+        response = admin_client.delete(f'/api/v1/users/{victim.username}/')
+        assert response.status_code == 204
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            1,
+            4,
+            4,
+        )
+        assert dict(
+            TitleScore.objects.values_list('score', 'count')
+        ) == {4: 1}
+        assert TitleRanking.objects.filter(reviews_count=1).exists()
+        assert Tombstone.objects.filter(model='review').count() == 1
+
+    def test_title_delete_cost_is_fixed(
+        self, admin_client, category, django_user_model
+    ):
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author{number}', email=f'author{number}@yamdb.fake'
+            )
+            for number in range(40)
+        ]
+
+        def delete_title(reviews):
+            title = Title.objects.create(
+                name='Фильм', description='Фильм', category=category
+            )
+            for number, author in enumerate(authors[:reviews]):
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв',
+                    score=number % 10 + 1,
+                )
+            url = f'/api/v1/titles/{title.id}/'
+            with CaptureQueriesContext(connection) as context:
+                assert admin_client.delete(url).status_code == 204
+            return len(context)
+
+        delete_title(1)
+        small = delete_title(10)
+        assert delete_title(40) == small, (
+            'Число запросов при удалении произведения не должно зависеть '
+            'от числа отзывов'
+        )
+        assert Tombstone.objects.filter(model='review').count() == 51
+        assert not TitleScore.objects.exists()
+
+    def test_category_titles_detached(self, admin_client, client, category):
+        titles = [
+            Title.objects.create(
+                name=f'Фильм {number}', description='Фильм', category=category
+            )
+            for number in range(5)
+        ]
+        response = admin_client.delete(
+            f'/api/v1/categories/{category.slug}/?background=true'
+        )
+        assert response.status_code == 202
+        assert client.get('/api/v1/categories/').json()['count'] == 0
+        title = client.get(f'/api/v1/titles/{titles[0].id}/').json()
+        assert title['category'] is None
+        assert (
+            client.get('/api/v1/titles/', {'category': category.slug}).json()[
+                'count'
+            ]
+            == 0
+        )
+
+        process_deletions()
+        assert not Category.objects.filter(pk=category.pk).exists()
+        assert not Title.objects.filter(category__isnull=False).exists()
+        assert Title.objects.count() == 5
+
+    def test_sync_delete_still_default(self, admin_client, title):
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204
+        assert not DeletionJob.objects.exists()
+
+    def test_failed_job_retried(self, admin_client, title):
+        admin_client.delete(f'/api/v1/titles/{title.id}/?background=true')
+        with mock.patch(
+            'reviews.deletion.run_job', side_effect=RuntimeError('Сбой')
+        ):
+            process_deletions()
+        job = DeletionJob.objects.get()
+        assert job.attempts == 1
+        assert job.last_error == 'Сбой'
+        assert job.next_attempt_at > timezone.now()
+        assert job.finished_at is None
+
+        DeletionJob.objects.update(next_attempt_at=timezone.now())
+        process_deletions()
+        assert not Title.objects.filter(pk=title.pk).exists()
+
+    def test_exhausted_job_reported(self, admin_client, title, settings):
+        settings.DELETION_MAX_ATTEMPTS = 1
+        admin_client.delete(f'/api/v1/titles/{title.id}/?background=true')
+        with mock.patch(
+            'reviews.deletion.run_job', side_effect=RuntimeError('Сбой')
+        ), mock.patch('reviews.deletion.logger') as logger:
+            with pytest.raises(CommandError):
+                process_deletions()
+        assert logger.error.called, 'Исчерпанная задача должна логироваться'
+        assert list(failed_jobs()) == [DeletionJob.objects.get()]
+        with pytest.raises(CommandError):
+            process_deletions()
+
+        assert retry_jobs(DeletionJob.objects.all()) == 1
+        process_deletions()
+        assert not Title.objects.filter(pk=title.pk).exists()
+        assert not failed_jobs().exists()
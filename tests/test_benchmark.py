@@ -0,0 +1,89 @@
+import json
+from io import StringIO
+
+import pytest
+from api.urls import urlpatterns, v1_router
+from django.core.cache import cache
+from django.core.management import call_command
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRanking)
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+    def seed(self):
+        call_command(
+            'seed_data', titles=20, reviews=50, comments=30, stdout=StringIO()
+        )
+        return (
+            list(Title.objects.order_by('pk').values_list('name', 'year')),
+            list(Review.objects.order_by('pk').values_list('score', 'text')),
+        )
+
+    def test_seed_data_is_deterministic(self, django_user_model):
+        first = self.seed()
+        assert (
+            Title.objects.count(),
+            Review.objects.count(),
+            Comment.objects.count(),
+        ) == (20, 50, 30)
+        assert Title.objects.filter(reviews_count__gt=0).count() == 20, (
+            'Проверьте, что после наполнения пересчитаны рейтинги'
+        )
+        assert TitleRanking.objects.exists()
+
+        Title.objects.all().delete()
+        Category.objects.all().delete()
+        Genre.objects.all().delete()
+        django_user_model.objects.all().delete()
+        assert self.seed() == first, (
+            'Проверьте, что данные определяются только параметрами и seed'
+        )
+
+    def test_seed_ids_are_ranges(self, genre):
+        from reviews.seeding import _create
+
+        ids = _create(
+            Genre,
+            (Genre(name=f'Жанр {n}', slug=f'g{n}') for n in range(5)),
+        )
+        assert isinstance(ids, range), (
+            'Новые id возвращаются диапазоном, а не списком'
+        )
+        assert list(ids) == list(
+            Genre.objects.exclude(pk=genre.pk)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        assert _create(Genre, []) == range(0)
+
+    def test_benchmark_covers_every_route(self, tmp_path):
+        call_command(
+            'seed_data', titles=5, reviews=10, comments=10, stdout=StringIO()
+        )
+        output = tmp_path / 'report.json'
+        cache.set('yamdb:version:reviews.title', 42, timeout=None)
+        call_command('benchmark_api', repeat=1, output=str(output))
+        report = json.loads(output.read_text())
+        assert cache.get('yamdb:version:reviews.title') == 42, (
+            'Замеры не должны очищать общий кэш приложения'
+        )
+
+        routes = {result['route'] for result in report['results']}
+        expected = {url.name for url in v1_router.urls} | {
+            url.name for url in urlpatterns if hasattr(url, 'name')
+        }
+        assert expected <= routes, (
+            f'Нет замеров для маршрутов: {expected - routes}'
+        )
+        for result in report['results']:
+            assert result['status'] < 500, result
+            assert set(result) >= {'queries', 'wall_ms', 'peak_memory_kb'}
+        statuses = {
+            result['name']: result['status'] for result in report['results']
+        }
+        assert statuses['reviews.delta'] == 200, (
+            'Замер ленты изменений не должен упираться в 410'
+        )
+        assert report['dataset']['titles'] == 5
+        assert set(report['catalog']) == {'genre', 'category'}
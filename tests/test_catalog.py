@@ -0,0 +1,162 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.catalog import catalog_stats, get_catalog
+from reviews.models import Category, Genre, Title
+from reviews.versions import bump_version
+
+CATALOG_TABLES = ('"reviews_genre"', '"reviews_category"')
+
+
+def slug_queries(context):
+    # Запросы, которые ищут жанр или категорию по слагу; вывод жанров
+    # произведения в ответе сюда не относится
+    return [
+        query['sql']
+        for query in context.captured_queries
+        if any(
+            f'{table}."slug" {operator}' in query['sql']
+            for table in CATALOG_TABLES
+            for operator in ('=', 'IN')
+        )
+    ]
+
+
+def new_title(name, genres=('drama',), category='movie'):
+    return {
+        'name': name,
+        'year': 2000,
+        'description': 'Описание',
+        'genre': list(genres),
+        'category': category,
+    }
+
+
+@pytest.mark.django_db
+class TestCatalog:
+    def test_slugs_resolved_without_database(
+        self, admin_client, client, title
+    ):
+        admin_client.post(
+            '/api/v1/titles/', new_title('Разогрев'), format='json'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                '/api/v1/titles/', new_title('Новое'), format='json'
+            )
+            assert response.status_code == 201, response.json()
+            response = admin_client.patch(
+                f'/api/v1/titles/{title.id}/',
+                {'genre': ['drama'], 'category': 'movie'},
+                format='json',
+            )
+            assert response.status_code == 200, response.json()
+            response = client.get('/api/v1/titles/?genre=drama&category=movie')
+            assert response.json()['count'] == 3
+            response = client.get('/api/v1/titles/leaderboard/?genre=drama')
+            assert response.status_code == 200
+        assert (
+            slug_queries(context) == []
+        ), 'Слаги жанров и категорий должны разрешаться без запросов к БД'
+        assert catalog_stats()['genre']['refreshes'] == 1
+        assert catalog_stats()['category']['refreshes'] == 1
+
+    def test_new_genre_visible_after_write(self, admin_client, title):
+        response = admin_client.post(
+            '/api/v1/titles/', new_title('Первое', ['comedy']), format='json'
+        )
+        assert response.status_code == 400
+        response = admin_client.post(
+            '/api/v1/genres/', {'name': 'Комедия', 'slug': 'comedy'}
+        )
+        assert response.status_code == 201
+        response = admin_client.post(
+            '/api/v1/titles/', new_title('Первое', ['comedy']), format='json'
+        )
+        assert (
+            response.status_code == 201
+        ), 'Каталог должен обновляться после добавления жанра'
+        # Промах при первой записи тоже перечитывает каталог
+        assert catalog_stats()['genre'] == {'size': 2, 'refreshes': 3}
+
+    def test_refresh_on_foreign_version_bump(self, genre):
+        assert set(get_catalog(Genre)) == {'drama'}
+        # Запись в другом процессе: строка уже в БД, версия сдвинута
+        # через общий кэш, а каталог этого процесса ещё старый
+        Genre.objects.bulk_create([Genre(name='Ужасы', slug='horror')])
+        assert set(get_catalog(Genre)) == {'drama'}
+        bump_version(Genre)
+        assert set(get_catalog(Genre)) == {'drama', 'horror'}
+        assert catalog_stats()['genre']['refreshes'] == 2
+
+    def test_pending_category_excluded(self, admin_client, client, title):
+        assert 'movie' in get_catalog(Category)
+        response = admin_client.delete(
+            '/api/v1/categories/movie/?background=true'
+        )
+        assert response.status_code == 202
+        assert 'movie' not in get_catalog(Category)
+        response = admin_client.post(
+            '/api/v1/titles/', new_title('Новое'), format='json'
+        )
+        assert response.status_code == 400
+        assert 'category' in response.json()
+        response = client.get('/api/v1/titles/?category=movie')
+        assert response.json()['count'] == 0
+        response = client.get('/api/v1/titles/leaderboard/?category=movie')
+        assert response.status_code == 404
+
+    def test_bulk_create_uses_catalog(self, admin_client, category, genre):
+        get_catalog(Genre), get_catalog(Category)
+        payload = [new_title(f'Пакет {number}') for number in range(3)]
+        payload.append(new_title('Ошибка', ['unknown']))
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                '/api/v1/titles/', payload, format='json'
+            )
+        assert response.status_code == 400
+        assert 'genre' in response.json()[3]
+        assert slug_queries(context) == []
+        response = admin_client.post(
+            '/api/v1/titles/', payload[:3], format='json'
+        )
+        assert response.status_code == 201
+        assert Title.objects.count() == 3
+
+    def test_genre_created_elsewhere_found_on_write(self, admin_client, title):
+        get_catalog(Genre)
+        # Другой процесс добавил жанр, а его версия сюда ещё не дошла
+        Genre.objects.bulk_create([Genre(name='Ужасы', slug='horror')])
+        response = admin_client.post(
+            '/api/v1/titles/', new_title('Новое', ['horror']), format='json'
+        )
+        assert response.status_code == 201, (
+            'Промах по каталогу при записи должен проверяться по БД'
+        )
+
+    # Внешние ключи проверяются при фиксации, поэтому запросы должны
+    # идти в настоящих транзакциях, а не в точках сохранения теста
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_deleted_elsewhere_rejected(self, admin_client, title):
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        assert 'comedy' in get_catalog(Genre)
+        # Удаление в другом процессе без сдвига версии в этом
+        Genre.objects.filter(pk=comedy.pk)._raw_delete(Genre.objects.db)
+        refreshes = catalog_stats()['genre']['refreshes']
+        for method, url, payload in (
+            ('post', '/api/v1/titles/', new_title('Одно', ['comedy'])),
+            ('post', '/api/v1/titles/', [new_title('Пакет', ['comedy'])]),
+            ('patch', f'/api/v1/titles/{title.id}/', {'genre': ['comedy']}),
+        ):
+            # Каталог снова устаревший, как до предыдущей попытки
+            get_catalog(Genre)['comedy'] = comedy
+            response = getattr(admin_client, method)(
+                url, payload, format='json'
+            )
+            assert response.status_code == 400, (
+                'Удалённый жанр из устаревшего каталога должен давать 400'
+            )
+            assert 'comedy' not in get_catalog(Genre)
+        assert catalog_stats()['genre']['refreshes'] == refreshes + 3
+        assert Title.objects.count() == 1
+        assert list(title.genre.values_list('slug', flat=True)) == ['drama']
@@ -0,0 +1,107 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.deletion import delete_with_dependents
+from reviews.models import Comment, Review, Tombstone
+
+
+@pytest.mark.django_db
+class TestCommentCounters:
+    @pytest.fixture
+    def review(self, title, user):
+        return Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+
+    def test_counters_follow_comments(self, review, user, another_user):
+        first = Comment.objects.create(review=review, author=user, text='К')
+        last = Comment.objects.create(
+            review=review, author=another_user, text='К'
+        )
+        review.refresh_from_db()
+        assert review.comment_count == 2
+        assert review.last_comment_at == last.pub_date
+
+        last.delete()
+        review.refresh_from_db()
+        assert (review.comment_count, review.last_comment_at) == (
+            1,
+            first.pub_date,
+        ), 'Проверьте пересчёт даты последнего комментария при удалении'
+
+        another_user.delete()
+        user.delete()
+        assert not Review.objects.exists()
+
+    def test_cascade_delete(self, review, user, another_user):
+        Comment.objects.create(review=review, author=another_user, text='К')
+        another_user.delete()
+        review.refresh_from_db()
+        assert (review.comment_count, review.last_comment_at) == (0, None)
+
+    def test_review_delete_cost_is_fixed(
+        self, user_client, title, user, another_user
+    ):
+        def delete_review(comments):
+            review = Review.objects.create(
+                title=title, author=user, text='Отзыв', score=5
+            )
+            Comment.objects.bulk_create(
+                Comment(review=review, author=another_user, text='К')
+                for _ in range(comments)
+            )
+            url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+            with CaptureQueriesContext(connection) as context:
+                assert user_client.delete(url).status_code == 204
+            return len(context)
+
+        delete_review(1)
+        small = delete_review(2)
+        assert delete_review(30) == small, (
+            'Число запросов при удалении отзыва не должно зависеть '
+            'от числа комментариев'
+        )
+        assert Tombstone.objects.filter(model='comment').count() == 33
+
+    def test_batched_cascade_keeps_counters(
+        self, review, title, user, another_user
+    ):
+        other = Review.objects.create(
+            title=title, author=another_user, text='Отзыв', score=3
+        )
+        kept = Comment.objects.create(
+            review=other, author=another_user, text='К'
+        )
+        Comment.objects.create(review=other, author=user, text='К')
+        Comment.objects.create(review=review, author=another_user, text='К')
+        delete_with_dependents(user)
+        other.refresh_from_db()
+        assert (other.comment_count, other.last_comment_at) == (
+            1,
+            kept.pub_date,
+        )
+        assert Tombstone.objects.filter(model='comment').count() == 2
+
+    def test_review_list_shows_counters(
+        self, client, title, review, user, django_assert_max_num_queries
+    ):
+        Comment.objects.create(review=review, author=user, text='К')
+        with django_assert_max_num_queries(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['results'][0]['comment_count'] == 1
+
+    def test_recount_comments(self, client, title, review, user):
+        Comment.objects.create(review=review, author=user, text='К')
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        Review.objects.update(comment_count=0, last_comment_at=None)
+        call_command('recount_comments', stdout=StringIO())
+        review.refresh_from_db()
+        assert review.comment_count == 1 and review.last_comment_at
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'После пересчёта кэшированные ответы и ETag должны сбрасываться'
+        )
@@ -0,0 +1,65 @@
+import pytest
+from reviews.models import Comment, Review
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_reviews_not_modified(
+        self, client, title, user, django_assert_num_queries
+    ):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert 'Last-Modified' not in response
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что при совпадении ETag возвращается 304'
+        )
+
+        review.text = 'Новый текст'
+        review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение отзыва меняет ETag'
+        )
+        assert response['ETag'] != etag
+
+    def test_comments_writes_in_same_second(self, client, title, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        # If-Modified-Since с точностью до секунды не даёт 304
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+        )
+        assert response.status_code == 200
+        etags = {etag}
+        for number in range(3):
+            Comment.objects.create(review=review, author=user, text='Текст')
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Каждая запись должна менять ETag, даже в ту же секунду'
+            )
+            assert response.json()['count'] == number + 1
+            etag = response['ETag']
+            etags.add(etag)
+        assert len(etags) == 4
+
+    def test_titles_not_modified(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        assert client.get(url)['ETag'] == etag, (
+            'Проверьте, что ETag закэшированного ответа не меняется'
+        )
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        title.name = 'Другое название'
+        title.save()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,176 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Comment, Review, Tombstone
+
+
+@pytest.fixture(autouse=True)
+def no_overlap(settings):
+    # Точные курсоры; повторную выдачу проверяет test_cursor_overlap
+    settings.DELTA_FEED_OVERLAP = 0
+
+
+@pytest.fixture
+def start():
+    return (timezone.now() - timedelta(minutes=1)).isoformat()
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    result = []
+    for number in range(5):
+        author = django_user_model.objects.create_user(
+            username=f'user{number}', email=f'user{number}@yamdb.fake'
+        )
+        result.append(
+            Review.objects.create(
+                title=title, author=author, text=f'{number}', score=5
+            )
+        )
+    return result
+
+
+def fetch_all(client, url, since):
+    # Клиент, догоняющий ленту порциями, пока has_more
+    items, deleted = {}, []
+    while True:
+        data = client.get(url, {'since': since}).json()
+        items.update((item['id'], item) for item in data['results'])
+        deleted.extend(data['deleted'])
+        since = data['since']
+        if not data['has_more']:
+            return items, deleted, since
+
+
+@pytest.mark.django_db
+class TestDeltaFeed:
+    def test_reviews_delta(
+        self, client, title, reviews, django_user_model, start
+    ):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url, {'since': start})
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['id'] for item in data['results']] == [
+            review.id for review in reviews
+        ]
+        assert data['deleted'] == []
+        assert data['has_more'] is False
+        since = data['since']
+
+        author = django_user_model.objects.create_user(
+            username='late', email='late@yamdb.fake'
+        )
+        created = Review.objects.create(
+            title=title, author=author, text='Новый', score=7
+        )
+        reviews[1].text = 'Изменён'
+        reviews[1].save()
+        deleted_id = reviews[2].id
+        reviews[2].delete()
+
+        data = client.get(url, {'since': since}).json()
+        assert {item['id'] for item in data['results']} == {
+            reviews[1].id,
+            created.id,
+        }, 'Проверьте, что лента отдаёт только новые и изменённые отзывы'
+        assert data['deleted'] == [deleted_id]
+
+        data = client.get(url, {'since': data['since']}).json()
+        assert data['results'] == []
+        assert data['deleted'] == []
+
+    def test_delta_pages_do_not_lose_ties(
+        self, client, title, reviews, settings, start
+    ):
+        settings.DELTA_FEED_LIMIT = 2
+        # Одинаковое время изменения у всех отзывов
+        Review.objects.update(updated_at=timezone.now())
+        deleted_id = reviews[0].id
+        reviews[0].delete()
+        items, deleted, _ = fetch_all(
+            client,
+            f'/api/v1/titles/{title.id}/reviews/',
+            start,
+        )
+        assert set(items) == {review.id for review in reviews[1:]}
+        assert deleted == [deleted_id]
+
+    def test_comment_added_updates_review(
+        self, client, title, reviews, user, start
+    ):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        since = client.get(url, {'since': start}).json()['since']
+        comment = Comment.objects.create(
+            review=reviews[3], author=user, text='Комментарий'
+        )
+        data = client.get(url, {'since': since}).json()
+        assert [item['id'] for item in data['results']] == [reviews[3].id]
+        assert data['results'][0]['comment_count'] == 1
+
+        comments_url = f'{url}{reviews[3].id}/comments/'
+        data = client.get(comments_url, {'since': since}).json()
+        assert [item['id'] for item in data['results']] == [comment.id]
+        comment_since = data['since']
+        comment_id = comment.id
+        comment.delete()
+        data = client.get(comments_url, {'since': comment_since}).json()
+        assert data['results'] == []
+        assert data['deleted'] == [comment_id]
+
+    def test_list_without_since_unchanged(self, client, title, reviews):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert 'results' in response.json()
+        assert 'deleted' not in response.json()
+
+    @pytest.mark.parametrize(
+        'since', ['вчера', '99999999999999999', '2000-13-01T00:00:00']
+    )
+    def test_bad_since(self, client, title, since):
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/', {'since': since}
+        )
+        assert response.status_code == 400
+        assert 'since' in response.json()
+
+    def test_expired_since(self, client, title, settings):
+        settings.DELTA_TOMBSTONE_RETENTION = 60
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        since = (timezone.now() - timedelta(minutes=2)).isoformat()
+        response = client.get(url, {'since': since})
+        assert response.status_code == 410, (
+            'since старше срока хранения надгробий требует полной загрузки'
+        )
+        assert client.get(url, {'since': '0'}).status_code == 410
+
+    def test_cursor_overlap(self, client, title, reviews, settings, start):
+        settings.DELTA_FEED_OVERLAP = 5
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = client.get(url, {'since': start}).json()
+        assert len(data['results']) == 5
+        # Отзыв, чья транзакция закоммичена позже, чем выдан курсор,
+        # но с более ранним updated_at
+        Review.objects.filter(pk=reviews[0].pk).update(
+            updated_at=timezone.now() - timedelta(seconds=2)
+        )
+        data = client.get(url, {'since': data['since']}).json()
+        assert reviews[0].id in [item['id'] for item in data['results']]
+        since = data['since']
+        assert client.get(url, {'since': since}).json()['since'] == since, (
+            'Без новых изменений курсор не должен сдвигаться назад'
+        )
+
+    def test_old_tombstones_purged(self, reviews):
+        old_id, new_id = reviews[0].id, reviews[1].id
+        reviews[0].delete()
+        reviews[1].delete()
+        Tombstone.objects.filter(object_id=old_id).update(
+            deleted_at=timezone.now() - timedelta(days=31)
+        )
+        call_command('process_deletions', '--once', stdout=StringIO())
+        assert list(Tombstone.objects.values_list('object_id', flat=True)) == [
+            new_id
+        ]
@@ -0,0 +1,104 @@
+import csv
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Comment, Review
+
+
+@pytest.fixture
+def reviews(title, django_user_model):
+    result = []
+    for number in range(5):
+        author = django_user_model.objects.create_user(
+            username=f'user{number}', email=f'user{number}@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=author, text=f'Отзыв {number}', score=number + 1
+        )
+        Comment.objects.create(
+            review=review, author=author, text=f'Комментарий {number}'
+        )
+        result.append(review)
+    return result
+
+
+def read_ndjson(response):
+    content = b''.join(response.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+    def test_export_requires_admin(self, user_client, reviews):
+        response = user_client.get('/api/v1/export/reviews/')
+        assert response.status_code == 403
+
+    def test_export_reviews_ndjson(self, admin_client, reviews, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        response = admin_client.get('/api/v1/export/reviews/')
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = read_ndjson(response)
+        assert [row['id'] for row in rows] == [
+            review.id for review in reviews
+        ], 'Проверьте, что выгружаются все отзывы по возрастанию id'
+        assert rows[0]['author'] == 'user0'
+        assert rows[0]['comment_count'] == 1
+
+    def test_export_resumes_after_id(self, admin_client, reviews):
+        response = admin_client.get(
+            '/api/v1/export/reviews/', {'after_id': reviews[2].id}
+        )
+        assert [row['id'] for row in read_ndjson(response)] == [
+            reviews[3].id,
+            reviews[4].id,
+        ]
+
+    def test_export_comments_csv(self, admin_client, reviews, title):
+        response = admin_client.get(
+            '/api/v1/export/comments/',
+            {'output': 'csv', 'title_id': title.id},
+        )
+        assert response['Content-Type'] == 'text/csv'
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        assert len(rows) == 5
+        assert rows[0]['text'] == 'Комментарий 0'
+        assert rows[0]['review_id'] == str(reviews[0].id)
+
+    def test_export_bad_params(self, admin_client):
+        assert admin_client.get('/api/v1/export/users/').status_code == 404
+        response = admin_client.get(
+            '/api/v1/export/reviews/', {'output': 'xml'}
+        )
+        assert response.status_code == 400
+        response = admin_client.get(
+            '/api/v1/export/reviews/', {'after_id': 'abc'}
+        )
+        assert response.status_code == 400
+
+    def test_export_command_resume(self, reviews, tmp_path):
+        output = tmp_path / 'reviews.csv'
+        call_command(
+            'export_data', 'reviews', output_format='csv',
+            output=str(output), chunk_size=2,
+        )
+        # Обрезаем файл, как будто выгрузка прервалась после третьей строки
+        lines = output.read_text(encoding='utf-8').splitlines(keepends=True)
+        output.write_text(''.join(lines[:4]), encoding='utf-8')
+        call_command(
+            'export_data', 'reviews', output_format='csv',
+            output=str(output), after_id=reviews[2].id,
+        )
+        rows = list(csv.DictReader(output.open(encoding='utf-8')))
+        assert [int(row['id']) for row in rows] == [
+            review.id for review in reviews
+        ]
+        stdout = StringIO()
+        call_command(
+            'export_data', 'comments', after_id=Comment.objects.order_by('id').last().id - 1,
+            stdout=stdout,
+        )
+        assert len(stdout.getvalue().splitlines()) == 1
@@ -0,0 +1,79 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Genre, Review, Title, TitleRanking
+
+
+def leaderboard(client, **params):
+    response = client.get('/api/v1/titles/leaderboard/', params)
+    assert response.status_code == 200
+    return [(row['name'], row['rating']) for row in response.json()]
+
+
+@pytest.mark.django_db
+class TestLeaderboard:
+    @pytest.fixture
+    def titles(self, title, category, user, another_user):
+        second = Title.objects.create(
+            name='Крёстный отец', description='Фильм', category=category
+        )
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        second.genre.add(comedy)
+        Title.objects.create(
+            name='Без отзывов', description='Фильм', category=category
+        )
+        Review.objects.create(title=title, author=user, text='О', score=6)
+        Review.objects.create(title=second, author=user, text='О', score=9)
+        Review.objects.create(
+            title=second, author=another_user, text='О', score=7
+        )
+        return title, second
+
+    def test_rankings_follow_reviews(self, client, titles):
+        title, second = titles
+        assert leaderboard(client) == [
+            (second.name, 8.0),
+            (title.name, 6.0),
+        ], 'Проверьте порядок в рейтинге'
+        assert leaderboard(client, genre='comedy') == [(second.name, 8.0)]
+        assert leaderboard(client, order='reviews', limit=1) == [
+            (second.name, 8.0)
+        ]
+
+        Review.objects.filter(title=second).delete()
+        assert leaderboard(client) == [(title.name, 6.0)], (
+            'Проверьте, что произведения без отзывов исключаются из рейтинга'
+        )
+
+    def test_genre_change_moves_title(self, client, titles):
+        title, second = titles
+        second.genre.clear()
+        assert leaderboard(client, genre='comedy') == []
+        title.genre.add(Genre.objects.get(slug='comedy'))
+        assert leaderboard(client, genre='comedy') == [(title.name, 6.0)]
+
+    def test_ties_ordered_by_title(self, client, category, user):
+        titles = [
+            Title.objects.create(
+                name=f'Фильм {number}', description='Фильм', category=category
+            )
+            for number in range(5)
+        ]
+        for title in reversed(titles):
+            Review.objects.create(title=title, author=user, text='О', score=7)
+        expected = [(title.name, 7.0) for title in titles]
+        for order in ('rating', 'reviews'):
+            assert leaderboard(client, order=order) == expected, (
+                'Одинаковые места должны идти в порядке id произведений'
+            )
+
+    def test_single_query(self, client, titles, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            client.get('/api/v1/titles/leaderboard/')
+
+    def test_rebuild_rankings(self, client, titles):
+        expected = leaderboard(client, category='movie')
+        TitleRanking.objects.all().delete()
+        call_command('rebuild_rankings', stdout=StringIO())
+        assert leaderboard(client, category='movie') == expected
@@ -0,0 +1,83 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import OutgoingEmail
+from reviews.outbox import deliver_batch, enqueue_email, queue_depth
+
+
+class FlakyBackend(EmailBackend):
+    def send_messages(self, messages):
+        if messages[0].to == ['broken@yamdb.fake']:
+            raise ConnectionError('SMTP недоступен')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestOutbox:
+    def test_signup_enqueues_email(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            {'username': 'newbie', 'email': 'newbie@yamdb.fake'},
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что письмо не отправляется внутри запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'newbie@yamdb.fake'
+        assert 'confirmation code' in email.body
+
+        call_command('send_emails', once=True, stdout=StringIO())
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['newbie@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+
+    def test_batch_reuses_one_connection(self):
+        for number in range(3):
+            enqueue_email('Тема', 'Текст', f'user{number}@yamdb.fake')
+        with mock.patch(
+            'reviews.outbox.get_connection', wraps=mail.get_connection
+        ) as get_connection:
+            assert deliver_batch(batch_size=10) == (3, 0)
+        assert get_connection.call_count == 1
+        assert len(mail.outbox) == 3
+        assert deliver_batch(batch_size=10) == (0, 0), (
+            'Проверьте, что отправленные письма не уходят повторно'
+        )
+
+    def test_failed_email_retried_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = f'{__name__}.FlakyBackend'
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        enqueue_email('Тема', 'Текст', 'broken@yamdb.fake')
+        enqueue_email('Тема', 'Текст', 'fine@yamdb.fake')
+
+        assert deliver_batch() == (1, 1)
+        broken = OutgoingEmail.objects.get(recipient='broken@yamdb.fake')
+        assert broken.attempts == 1
+        assert broken.last_error == 'SMTP недоступен'
+        assert broken.next_attempt_at > timezone.now()
+        assert queue_depth() == {'pending': 1, 'ready': 0, 'failed': 0}
+
+        assert deliver_batch() == (0, 0), (
+            'Проверьте, что повтор откладывается до next_attempt_at'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        assert deliver_batch() == (0, 1)
+        assert queue_depth() == {'pending': 0, 'ready': 0, 'failed': 1}
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        assert deliver_batch() == (0, 0), (
+            'Проверьте, что после исчерпания попыток письмо не отправляется'
+        )
+
+    def test_stats(self):
+        enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        stdout = StringIO()
+        call_command('send_emails', stats=True, stdout=stdout)
+        assert 'В очереди: 1' in stdout.getvalue()
+        assert len(mail.outbox) == 0
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Review
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    def test_page_number_pagination_by_default(self, client, title):
+        response = client.get('/api/v1/titles/')
+        assert 'count' in response.json(), (
+            'Проверьте, что по умолчанию используется постраничная пагинация'
+        )
+
+    def test_reviews_cursor_pagination(
+        self, client, title, django_user_model
+    ):
+        for number in range(15):
+            author = django_user_model.objects.create_user(
+                username=f'user{number}', email=f'user{number}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        seen = []
+        query_counts = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            query_counts.append(len(context))
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме не выполняется COUNT(*)'
+            )
+            seen.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert seen == list(
+            Review.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        ), 'Проверьте, что курсорная пагинация обходит все отзывы'
+        assert len(set(query_counts)) == 1, (
+            'Проверьте, что каждая страница стоит одинаковое число запросов'
+        )
+
+    def test_cursor_with_equal_pub_date(
+        self, client, title, django_user_model
+    ):
+        for number in range(12):
+            author = django_user_model.objects.create_user(
+                username=f'user{number}', email=f'user{number}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        Review.objects.update(pub_date=Review.objects.first().pub_date)
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        seen = []
+        while url:
+            data = client.get(url).json()
+            seen.extend(review['id'] for review in data['results'])
+            url = data['next']
+        assert seen == sorted(
+            Review.objects.values_list('id', flat=True), reverse=True
+        ), 'Отзывы с одинаковой датой не должны повторяться или теряться'
+
+    def test_titles_cursor_previous(self, client, title):
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        data = response.json()
+        assert data['previous'] is None and data['results'][0]['id'] == (
+            title.id
+        )
@@ -0,0 +1,142 @@
+import pytest
+from django.conf import settings as django_settings
+from reviews.models import Comment, Review, Title
+
+from .conftest import get_client
+
+ENDPOINTS = [
+    ('GET users-list', 'get', '/api/v1/users/', None),
+    ('GET users-detail', 'get', '/api/v1/users/user0/', None),
+    ('GET users-me', 'get', '/api/v1/users/me/', None),
+    ('GET categories-list', 'get', '/api/v1/categories/', None),
+    ('GET genres-list', 'get', '/api/v1/genres/', None),
+    ('GET title-list', 'get', '/api/v1/titles/', None),
+    ('GET title-detail', 'get', '/api/v1/titles/{title}/', None),
+    ('GET title-leaderboard', 'get', '/api/v1/titles/leaderboard/', None),
+    (
+        'GET title-score-distribution',
+        'get',
+        '/api/v1/titles/{title}/score-distribution/',
+        None,
+    ),
+    ('GET reviews-list', 'get', '/api/v1/titles/{title}/reviews/', None),
+    (
+        'GET reviews-detail',
+        'get',
+        '/api/v1/titles/{title}/reviews/{review}/',
+        None,
+    ),
+    (
+        'GET comments-list',
+        'get',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+        None,
+    ),
+    (
+        'GET comments-detail',
+        'get',
+        '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/',
+        None,
+    ),
+    ('GET reviews-batch', 'get', '/api/v1/reviews/?title_ids={title}', None),
+    (
+        'POST title-list',
+        'post',
+        '/api/v1/titles/',
+        {
+            'name': 'Новое',
+            'description': 'Фильм',
+            'year': 2000,
+            'genre': ['drama'],
+            'category': 'movie',
+        },
+    ),
+    ('PATCH title-detail', 'patch', '/api/v1/titles/{title}/', {'year': 1995}),
+    (
+        'POST reviews-list',
+        'post',
+        '/api/v1/titles/{title}/reviews/',
+        {'text': 'Отзыв', 'score': 7},
+    ),
+    (
+        'POST comments-list',
+        'post',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+        {'text': 'Комментарий'},
+    ),
+    (
+        'POST signup',
+        'post',
+        '/api/v1/auth/signup/',
+        {'username': 'newbie', 'email': 'newbie@yamdb.fake'},
+    ),
+    (
+        'POST users-bulk',
+        'post',
+        '/api/v1/users/bulk/',
+        {
+            'usernames': [f'user{number}' for number in range(5)],
+            'operation': 'set_role',
+            'role': 'moderator',
+        },
+    ),
+]
+
+
+@pytest.fixture
+def dataset(title, category, genre, django_user_model):
+    # По нескольку авторов, отзывов и произведений, чтобы N+1 проявился
+    # повторяющимися запросами.
+    for number in range(5):
+        author = django_user_model.objects.create_user(
+            username=f'user{number}', email=f'user{number}@yamdb.fake'
+        )
+        other = Title.objects.create(
+            name=f'Фильм {number}', year=2000, category=category
+        )
+        other.genre.add(genre)
+        review = Review.objects.create(
+            title=title, author=author, text='Отзыв', score=number + 1
+        )
+        comment = Comment.objects.create(
+            review=review, author=author, text='Комментарий'
+        )
+    return {'title': title.id, 'review': review.id, 'comment': comment.id}
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    def test_every_endpoint_has_budget(self):
+        assert {endpoint for endpoint, *_ in ENDPOINTS} == set(
+            django_settings.QUERY_BUDGETS
+        )
+
+    @pytest.mark.parametrize(
+        'endpoint,method,url,data',
+        ENDPOINTS,
+        ids=[endpoint for endpoint, *_ in ENDPOINTS],
+    )
+    def test_endpoint_within_budget(
+        self, admin, dataset, query_budget, endpoint, method, url, data
+    ):
+        client = get_client(admin)
+        with query_budget(endpoint):
+            response = getattr(client, method)(
+                url.format(**dataset), data, format='json'
+            )
+        assert response.status_code < 300, response.content
+
+    def test_headers(self, client, dataset, settings):
+        url = '/api/v1/titles/{title}/reviews/'.format(**dataset)
+        assert 'X-Query-Count' not in client.get(url)
+        settings.QUERY_INSTRUMENTATION = True
+        response = client.get(url)
+        assert response['X-Query-Count'] == '2'
+        assert float(response['X-Query-Time']) >= 0
+        assert response['X-Query-Duplicates'] == '0'
+
+    def test_n_plus_one_detected(self, dataset, query_budget):
+        with pytest.raises(AssertionError, match='N\\+1'):
+            with query_budget(100):
+                for review in Review.objects.all():
+                    review.author.username
@@ -0,0 +1,48 @@
+import pytest
+from api.cache import response_cache_stats
+from reviews.models import Genre, Review
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_repeated_read_is_served_from_cache(
+        self, client, title, django_assert_num_queries
+    ):
+        url = f'/api/v1/titles/{title.id}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response['X-Cache'] == 'HIT'
+        assert response.json()['name'] == title.name
+        assert response_cache_stats() == {'hit': 1, 'miss': 1}
+
+    def test_key_includes_query_string_and_role(
+        self, client, user_client, genre
+    ):
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/genres/?search=д')['X-Cache'] == 'MISS'
+        assert user_client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
+
+    def test_write_invalidates_cache(self, client, admin_client, title, user):
+        client.get('/api/v1/genres/')
+        admin_client.post(
+            '/api/v1/genres/', {'name': 'Комедия', 'slug': 'comedy'}
+        )
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 2
+
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=7)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+        assert response.json()['rating'] == 7.0
+
+        Genre.objects.filter(slug='comedy').get().delete()
+        client.get(url)
+        title.genre.clear()
+        assert client.get(url).json()['genre'] == []
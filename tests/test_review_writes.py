@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+
+def post(client, url, data):
+    with CaptureQueriesContext(connection) as context:
+        response = client.post(url, data, format='json')
+    return response, len(context)
+
+
+@pytest.mark.django_db
+class TestReviewWrites:
+    def test_review_create_query_count_is_fixed(
+        self, user_client, title, category, django_user_model
+    ):
+        other = Title.objects.create(
+            name='Другое', description='Фильм', category=category
+        )
+        for number in range(20):
+            Review.objects.create(
+                title=other,
+                author=django_user_model.objects.create_user(
+                    username=f'user{number}', email=f'user{number}@yamdb.fake'
+                ),
+                text='Отзыв',
+                score=5,
+            )
+        Review.objects.create(
+            title=title,
+            author=Review.objects.first().author,
+            text='Отзыв',
+            score=5,
+        )
+        # Пользователь токена попадает в кэш при первом запросе
+        user_client.get('/api/v1/users/me/')
+        response, first = post(
+            user_client,
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Отзыв', 'score': 5},
+        )
+        assert response.status_code == 201
+        response, second = post(
+            user_client,
+            f'/api/v1/titles/{other.id}/reviews/',
+            {'text': 'Отзыв', 'score': 5},
+        )
+        assert response.status_code == 201
+        assert first == second, (
+            'Проверьте, что создание отзыва не зависит от числа отзывов'
+        )
+
+    def test_duplicate_review(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 400
+        title.refresh_from_db()
+        assert (title.reviews_count, title.rating) == (1, 5.0)
+
+    def test_review_for_missing_title(self, user_client):
+        response = user_client.post(
+            '/api/v1/titles/100500/reviews/', {'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == 404
+
+    def test_comment_parent_chain(self, user_client, title, category, user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5
+        )
+        other = Title.objects.create(
+            name='Другое', description='Фильм', category=category
+        )
+        url = f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        assert user_client.post(url, {'text': 'К'}).status_code == 404, (
+            'Проверьте, что отзыв должен относиться к произведению из URL'
+        )
+        Comment.objects.create(review=review, author=user, text='К')
+        assert user_client.get(url).json()['count'] == 0
+
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        response, queries = post(user_client, url, {'text': 'К'})
+        assert response.status_code == 201
+        assert queries <= 3
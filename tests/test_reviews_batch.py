@@ -0,0 +1,43 @@
+import pytest
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestReviewsBatch:
+    def test_latest_reviews_grouped_by_title(
+        self, client, title, category, django_user_model,
+        django_assert_num_queries,
+    ):
+        other = Title.objects.create(
+            name='Другое', description='Фильм', category=category
+        )
+        empty = Title.objects.create(
+            name='Пустое', description='Фильм', category=category
+        )
+        for number in range(4):
+            author = django_user_model.objects.create_user(
+                username=f'user{number}', email=f'user{number}@yamdb.fake'
+            )
+            for current in (title, other):
+                Review.objects.create(
+                    title=current, author=author, text=f'{number}', score=5
+                )
+        with django_assert_num_queries(1):
+            response = client.get(
+                '/api/v1/reviews/',
+                {'title_ids': f'{title.id},{other.id},{empty.id}', 'limit': 2},
+            )
+        assert response.status_code == 200
+        data = response.json()
+        assert [review['text'] for review in data[str(title.id)]] == [
+            '3',
+            '2',
+        ], 'Проверьте, что возвращаются последние отзывы произведения'
+        assert len(data[str(other.id)]) == 2
+        assert data[str(empty.id)] == []
+        assert data[str(title.id)][0]['author'] == 'user3'
+
+    def test_bad_title_ids(self, client):
+        assert client.get('/api/v1/reviews/').status_code == 400
+        response = client.get('/api/v1/reviews/', {'title_ids': '1,x'})
+        assert response.status_code == 400
@@ -0,0 +1,57 @@
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+from reviews.checks import check_shared_cache
+from reviews.models import Genre, Title
+from reviews.versions import bump_version, get_versions
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    # Файловый кэш в общем каталоге ведёт себя как memcached: другой
+    # процесс - это другой экземпляр бэкенда с тем же хранилищем
+    settings.CACHES = {
+        'default': {'BACKEND': FILE_CACHE, 'LOCATION': str(tmp_path)}
+    }
+    return FileBasedCache(str(tmp_path), {})
+
+
+@pytest.mark.django_db
+class TestSharedCache:
+    def test_version_bump_seen_by_other_process(self, shared_cache):
+        before = get_versions(Title)[0]
+        key = 'yamdb:version:reviews.title'
+        assert shared_cache.get(key) == before
+        shared_cache.set(key, before + 1000, timeout=None)
+        assert get_versions(Title)[0] == before + 1000, (
+            'Версия, сдвинутая другим процессом, должна быть видна сразу'
+        )
+        bump_version(Title)
+        assert shared_cache.get(key) > before + 1000
+
+    def test_response_invalidated_by_other_process(
+        self, shared_cache, client, genre
+    ):
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'HIT'
+        Genre.objects.bulk_create([Genre(name='Комедия', slug='comedy')])
+        key = 'yamdb:version:reviews.genre'
+        shared_cache.set(key, shared_cache.get(key) + 1, timeout=None)
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 2
+
+    def test_deploy_check_requires_shared_cache(self, settings, tmp_path):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+            }
+        }
+        assert [error.id for error in check_shared_cache(None)] == [
+            'reviews.E001'
+        ]
+        settings.CACHES = {
+            'default': {'BACKEND': FILE_CACHE, 'LOCATION': str(tmp_path)}
+        }
+        assert check_shared_cache(None) == []
@@ -0,0 +1,66 @@
+from unittest import mock
+
+import pytest
+from api.serializers import RegisterDataSerializer
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def signup(client, username, email):
+    return client.post(
+        '/api/v1/auth/signup/', {'username': username, 'email': email}
+    )
+
+
+@pytest.mark.django_db
+class TestSignup:
+    def test_new_user_single_lookup(self, client, django_user_model):
+        with CaptureQueriesContext(connection) as queries:
+            response = signup(client, 'newbie', 'newbie@yamdb.fake')
+        assert response.status_code == 200
+        assert response.json() == {
+            'username': 'newbie',
+            'email': 'newbie@yamdb.fake',
+        }
+        user_queries = [
+            query['sql']
+            for query in queries
+            if 'reviews_user' in query['sql']
+        ]
+        assert len(user_queries) == 2, (
+            'Проверьте, что регистрация делает один SELECT и один INSERT: '
+            f'{user_queries}'
+        )
+        assert django_user_model.objects.filter(username='newbie').exists()
+
+    def test_existing_user_gets_new_code(self, client, user, django_user_model):
+        response = signup(client, user.username, user.email)
+        assert response.status_code == 200
+        assert django_user_model.objects.count() == 1
+
+    @pytest.mark.parametrize(
+        'username,email',
+        [('TestUser', 'other@yamdb.fake'), ('other', 'testuser@yamdb.fake')],
+    )
+    def test_conflict(self, client, user, username, email):
+        response = signup(client, username, email)
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Почта или имя уже использовались']
+        }
+
+    def test_concurrent_insert_returns_400(self, client, user):
+        # Проверка прошла до того, как параллельный запрос создал
+        # пользователя с той же почтой
+        def stale_validate(self, data):
+            self.existing = None
+            return data
+
+        with mock.patch.object(
+            RegisterDataSerializer, 'validate', stale_validate
+        ):
+            response = signup(client, 'other', user.email)
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Почта или имя уже использовались']
+        }
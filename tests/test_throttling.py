@@ -0,0 +1,104 @@
+from unittest import mock
+
+import pytest
+from api.throttling import SignupIPThrottle, TokenBucketThrottle
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+@pytest.fixture
+def clock():
+    now = [1_000_000.0]
+    with mock.patch.object(TokenBucketThrottle, 'timer', lambda self: now[0]):
+        yield now
+
+
+def signup(client, number, ip='10.0.0.1', username=None, **headers):
+    return client.post(
+        '/api/v1/auth/signup/',
+        {
+            'username': username or f'user{number}',
+            'email': f'user{number}@yamdb.fake',
+        },
+        REMOTE_ADDR=ip,
+        **headers,
+    )
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    def test_signup_ip_bucket(self, client, settings, clock):
+        settings.AUTH_THROTTLE_RATES = {'signup_ip': '2/min'}
+        assert signup(client, 1).status_code == 200
+        assert signup(client, 2).status_code == 200
+        response = signup(client, 3)
+        assert response.status_code == 429, (
+            'Проверьте, что после исчерпания лимита возвращается 429'
+        )
+        assert response['Retry-After'] == '30'
+        assert signup(client, 3, ip='10.0.0.2').status_code == 200, (
+            'Проверьте, что лимит считается отдельно для каждого IP'
+        )
+
+        # Токен восстанавливается за period / N секунд
+        clock[0] += 30
+        assert signup(client, 4).status_code == 200
+        assert signup(client, 5).status_code == 429
+
+    def test_signup_username_bucket(self, client, settings, clock):
+        settings.AUTH_THROTTLE_RATES = {'signup_username': '1/hour'}
+        assert signup(client, 1, username='bot').status_code == 200
+        response = signup(client, 2, ip='10.0.0.2', username='BOT')
+        assert response.status_code == 429, (
+            'Проверьте, что лимит по имени действует с любого IP'
+        )
+        assert int(response['Retry-After']) == 3600
+
+    def test_token_throttled(self, client, settings, clock, user):
+        settings.AUTH_THROTTLE_RATES = {'token_username': '3/min'}
+        data = {'username': user.username, 'confirmation_code': 'wrong'}
+        for _ in range(3):
+            response = client.post('/api/v1/auth/token/', data)
+            assert response.status_code == 400
+        response = client.post('/api/v1/auth/token/', data)
+        assert response.status_code == 429
+        assert 'Retry-After' in response
+
+    def test_default_rates_allow_normal_use(self, client):
+        for number in range(3):
+            assert signup(client, number).status_code == 200
+
+    def test_forwarded_for_not_spoofable(self, client, settings, clock):
+        settings.AUTH_THROTTLE_RATES = {'signup_ip': '1/min'}
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'NUM_PROXIES': 1,
+        }
+        # nginx дописывает адрес клиента в конец X-Forwarded-For
+        assert (
+            signup(client, 1, HTTP_X_FORWARDED_FOR='1.1.1.1, 10.0.0.9')
+        ).status_code == 200
+        response = signup(
+            client, 2, HTTP_X_FORWARDED_FOR='2.2.2.2, 10.0.0.9'
+        )
+        assert response.status_code == 429, (
+            'Подставленный клиентом адрес не должен обходить лимит'
+        )
+        assert (
+            signup(client, 3, HTTP_X_FORWARDED_FOR='10.0.0.8')
+        ).status_code == 200
+
+    def test_bucket_shared_between_processes(self, settings, tmp_path, clock):
+        backend = 'django.core.cache.backends.filebased.FileBasedCache'
+        settings.CACHES = {
+            'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)}
+        }
+        settings.AUTH_THROTTLE_RATES = {'signup_ip': '2/min'}
+        request = mock.Mock(META={'REMOTE_ADDR': '10.0.0.1'})
+        first, second = SignupIPThrottle(), SignupIPThrottle()
+        # Другой процесс - другой экземпляр бэкенда с тем же хранилищем
+        second.cache = FileBasedCache(str(tmp_path), {})
+        assert first.allow_request(request, None)
+        assert second.allow_request(request, None)
+        assert not first.allow_request(request, None)
+        assert not second.allow_request(request, None)
+        assert first.wait() == 30, 'Отказ не должен расходовать запас'
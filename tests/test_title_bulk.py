@@ -0,0 +1,107 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Genre, GenreTitle, Review, Title, TitleRanking
+
+
+def titles_payload(count, genres=('drama', 'comedy'), category='movie'):
+    return [
+        {
+            'name': f'Произведение {number}',
+            'year': 2000,
+            'description': 'Описание',
+            'genre': list(genres),
+            'category': category,
+        }
+        for number in range(count)
+    ]
+
+
+@pytest.mark.django_db
+class TestTitleBulkCreate:
+    def test_bulk_create_query_count_is_constant(
+        self, admin_client, admin, category, genre
+    ):
+        Genre.objects.create(name='Комедия', slug='comedy')
+        payload = titles_payload(30)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                '/api/v1/titles/', payload, format='json'
+            )
+        assert response.status_code == 201, response.json()
+        assert len(response.json()) == 30
+        assert response.json()[0]['genre'] == ['drama', 'comedy']
+        assert Title.objects.count() == 30
+        assert GenreTitle.objects.count() == 60
+        assert len(context) <= 10, (
+            'Проверьте, что пакетное создание выполняется фиксированным '
+            'числом запросов'
+        )
+
+    def test_bulk_create_validation(self, admin_client, title):
+        payload = titles_payload(2, genres=('drama', 'unknown'))
+        payload.append(dict(payload[0], genre=['drama'], name=title.name))
+        response = admin_client.post(
+            '/api/v1/titles/', payload, format='json'
+        )
+        assert response.status_code == 400
+        errors = response.json()
+        assert 'genre' in errors[0] and 'name' in errors[2]
+        assert Title.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestTitleGenreUpdate:
+    def test_patch_changes_only_modified_rows(self, admin_client, title):
+        Genre.objects.create(name='Комедия', slug='comedy')
+        kept = GenreTitle.objects.get(title=title)
+        response = admin_client.patch(
+            f'/api/v1/titles/{title.id}/',
+            {'genre': ['drama', 'comedy']},
+            format='json',
+        )
+        assert response.status_code == 200
+        assert sorted(response.json()['genre']) == ['comedy', 'drama']
+        assert GenreTitle.objects.filter(pk=kept.pk).exists(), (
+            'Проверьте, что неизменённые связи с жанрами не пересоздаются'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{title.id}/', {'genre': ['comedy']},
+            format='json',
+        )
+        assert list(title.genre.values_list('slug', flat=True)) == ['comedy']
+
+    def test_patch_refreshes_ranking_once(
+        self, admin_client, title, category, user
+    ):
+        Review.objects.create(title=title, author=user, text='О', score=5)
+        genres = [
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+            for number in range(9)
+        ]
+        title.genre.add(*genres)
+        url = f'/api/v1/titles/{title.id}/'
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(
+                url, {'genre': ['drama']}, format='json'
+            )
+        assert response.status_code == 200
+        rebuilds = [
+            query['sql']
+            for query in context.captured_queries
+            if query['sql'].startswith('DELETE FROM "reviews_titleranking"')
+        ]
+        assert len(rebuilds) == 1, (
+            'Рейтинговые строки должны пересобираться один раз за запрос'
+        )
+        assert len(context) <= 20
+        assert set(
+            TitleRanking.objects.filter(title=title).values_list(
+                'scope', flat=True
+            )
+        ) == {
+            TitleRanking.SCOPE_ALL,
+            TitleRanking.category_scope(category.pk),
+            TitleRanking.genre_scope(title.genre.get().pk),
+        }
@@ -0,0 +1,118 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Title
+
+
+def create_titles(count, category, genres, year=2000):
+    for number in range(count):
+        title = Title.objects.create(
+            name=f'{category.slug} {year} {number}',
+            year=year,
+            description='Описание',
+            category=category,
+        )
+        title.genre.set(genres)
+
+
+@pytest.fixture
+def catalog():
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    book = Category.objects.create(name='Книга', slug='book')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    create_titles(3, movie, [drama], year=2000)
+    create_titles(2, movie, [drama, comedy], year=2010)
+    create_titles(1, book, [comedy], year=2010)
+    return {'movie': movie, 'drama': drama, 'comedy': comedy}
+
+
+def get_facets(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.json()
+    return response.json()
+
+
+@pytest.mark.django_db
+class TestTitleFacets:
+    def test_no_facets_by_default(self, client, catalog):
+        assert 'facets' not in get_facets(client, '/api/v1/titles/')
+
+    def test_all_facets(self, client, catalog):
+        data = get_facets(client, '/api/v1/titles/?facets=true')
+        assert data['count'] == 6
+        assert data['facets'] == {
+            'genre': [
+                {'slug': 'drama', 'count': 5},
+                {'slug': 'comedy', 'count': 3},
+            ],
+            'category': [
+                {'slug': 'movie', 'count': 5},
+                {'slug': 'book', 'count': 1},
+            ],
+            'year': [
+                {'year': 2010, 'count': 3},
+                {'year': 2000, 'count': 3},
+            ],
+        }
+
+    def test_facets_follow_filters(self, client, catalog):
+        data = get_facets(
+            client, '/api/v1/titles/?genre=comedy&facets=category,year'
+        )
+        assert data['count'] == 3
+        assert data['facets'] == {
+            'category': [
+                {'slug': 'movie', 'count': 2},
+                {'slug': 'book', 'count': 1},
+            ],
+            'year': [{'year': 2010, 'count': 3}],
+        }, 'Счётчики фасетов должны учитывать текущие фильтры'
+        data = get_facets(
+            client,
+            '/api/v1/titles/?category=movie&year=2000&facets=genre'
+            '&pagination=cursor',
+        )
+        assert data['facets'] == {'genre': [{'slug': 'drama', 'count': 3}]}
+
+    def test_query_count_is_constant(self, client, catalog):
+        url = '/api/v1/titles/?facets=true'
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            client.get(f'{url}&page=1')
+        small = len(context)
+        for number in range(5):
+            genre = Genre.objects.create(
+                name=f'Жанр {number}', slug=f'g{number}'
+            )
+            category = Category.objects.create(
+                name=f'Категория {number}', slug=f'c{number}'
+            )
+            create_titles(2, category, [genre], year=1990 + number)
+        client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            data = get_facets(client, f'{url}&page=1')
+        assert len(data['facets']['genre']) == 7
+        assert len(data['facets']['year']) == 7
+        assert (
+            len(context) == small
+        ), 'Число запросов не должно зависеть от числа значений фасетов'
+
+    def test_pending_category_skipped(self, admin_client, client, catalog):
+        admin_client.delete('/api/v1/categories/book/?background=true')
+        data = get_facets(client, '/api/v1/titles/?facets=category')
+        assert data['facets']['category'] == [{'slug': 'movie', 'count': 5}]
+
+    def test_cached_response_includes_facets(self, client, catalog):
+        url = '/api/v1/titles/?facets=year'
+        first = client.get(url)
+        second = client.get(url)
+        assert second['X-Cache'] == 'HIT'
+        assert second.json()['facets'] == first.json()['facets']
+        other = client.get('/api/v1/titles/')
+        assert 'facets' not in other.json()
+
+    def test_unknown_facet(self, client, catalog):
+        response = client.get('/api/v1/titles/?facets=genre,rating')
+        assert response.status_code == 400
+        assert 'facets' in response.json()
@@ -0,0 +1,70 @@
+import pytest
+from api.pagination import TitlePagination
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Review, Title
+
+
+def create_titles(count, category, genres, authors):
+    for number in range(count):
+        title = Title.objects.create(
+            name=f'Произведение {number}',
+            year=2000 + number,
+            description='Описание',
+            category=category,
+        )
+        title.genre.set(genres)
+        for author in authors:
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+
+
+def count_queries(client, url):
+    # Первый запрос загружает каталог жанров и категорий процесса
+    client.get(url)
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, f'Страница {url} недоступна'
+    return len(context)
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+    @pytest.mark.parametrize(
+        'url',
+        [
+            '/api/v1/titles/',
+            '/api/v1/titles/?genre=drama',
+            '/api/v1/titles/?category=movie&genre=comedy',
+            '/api/v1/titles/?year=2000',
+        ],
+    )
+    @pytest.mark.parametrize('page_size', [5, 30])
+    def test_title_list_query_count_is_constant(
+        self, client, user, another_user, url, page_size, monkeypatch
+    ):
+        category = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        ]
+        create_titles(1, category, genres, [user])
+        small = count_queries(client, url)
+
+        Title.objects.all().delete()
+        genres.append(Genre.objects.create(name='Ужасы', slug='horror'))
+        create_titles(30, category, genres, [user, another_user])
+        Title.objects.update(year=2000)
+        monkeypatch.setattr(TitlePagination, 'page_size', page_size)
+        large = count_queries(client, url)
+        assert len(client.get(url).json()['results']) == page_size
+
+        assert small == large <= 3, (
+            'Проверьте, что число запросов к БД при выводе списка '
+            'произведений не зависит от их количества и размера страницы'
+        )
+
+    def test_title_retrieve_query_count(self, client, title, user):
+        Review.objects.create(title=title, author=user, text='Отзыв', score=1)
+        assert count_queries(client, f'/api/v1/titles/{title.id}/') <= 2
@@ -0,0 +1,104 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+    def test_rating_follows_review_writes(self, title, user, another_user):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=4
+        )
+        Review.objects.create(
+            title=title, author=another_user, text='Отзыв', score=10
+        )
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            2,
+            14,
+            7.0,
+        ), 'Проверьте, что рейтинг обновляется при создании отзыва'
+
+        review.score = 8
+        review.save()
+        title.refresh_from_db()
+        assert (
+            title.rating == 9.0
+        ), 'Проверьте, что рейтинг обновляется при изменении оценки'
+
+        review.delete()
+        title.refresh_from_db()
+        assert (title.reviews_count, title.rating) == (
+            1,
+            10.0,
+        ), 'Проверьте, что рейтинг обновляется при удалении отзыва'
+
+    def test_rating_follows_cascade_delete(self, title, user):
+        Review.objects.create(title=title, author=user, text='Отзыв', score=3)
+        user.delete()
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            0,
+            0,
+            None,
+        ), 'Проверьте, что рейтинг обновляется при каскадном удалении'
+
+    def test_recalculate_ratings(self, title, user, another_user):
+        Review.objects.create(title=title, author=user, text='Отзыв', score=2)
+        Review.objects.create(
+            title=title, author=another_user, text='Отзыв', score=5
+        )
+        Title.objects.update(reviews_count=0, score_sum=0, rating=None)
+        call_command('recalculate_ratings', stdout=StringIO())
+        title.refresh_from_db()
+        assert (title.reviews_count, title.score_sum, title.rating) == (
+            2,
+            7,
+            3.5,
+        ), 'Проверьте команду recalculate_ratings'
+
+    def test_title_list_uses_stored_rating(self, client, title, user):
+        Review.objects.create(title=title, author=user, text='Отзыв', score=6)
+        response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert response.json()['results'][0]['rating'] == 6.0
+
+
+@pytest.mark.django_db
+class TestScoreDistribution:
+    def test_distribution_follows_reviews(
+        self, client, title, user, another_user, django_assert_num_queries
+    ):
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=4
+        )
+        Review.objects.create(
+            title=title, author=another_user, text='Отзыв', score=4
+        )
+        review.score = 9
+        review.save()
+        url = f'/api/v1/titles/{title.id}/score-distribution/'
+        with django_assert_num_queries(1):
+            data = client.get(url).json()
+        assert data['count'] == 2
+        assert data['distribution']['4'] == 1
+        assert data['distribution']['9'] == 1
+        assert data['distribution']['10'] == 0
+
+        review.delete()
+        data = client.get(url).json()
+        assert data['count'] == 1 and data['distribution']['9'] == 0
+
+    def test_distribution_of_missing_title(self, client):
+        response = client.get('/api/v1/titles/100500/score-distribution/')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('pk', ['abc', '1a', '-1'])
+    def test_distribution_of_invalid_id(self, client, title, pk):
+        response = client.get(f'/api/v1/titles/{pk}/score-distribution/')
+        assert response.status_code == 404, (
+            'Нечисловой id произведения должен давать 404, а не 500'
+        )
+        assert client.get(f'/api/v1/titles/{pk}/').status_code == 404
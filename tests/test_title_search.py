@@ -0,0 +1,57 @@
+import pytest
+from reviews.models import Title
+
+
+def search(client, term):
+    response = client.get('/api/v1/titles/', {'name': term})
+    assert response.status_code == 200
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+    def test_search_by_name_and_description(self, client, category):
+        Title.objects.create(
+            name='Властелин колец', description='Фэнтези', category=category
+        )
+        Title.objects.create(
+            name='Хоббит', description='Приквел Властелина', category=category
+        )
+        Title.objects.create(
+            name='Матрица', description='Киберпанк', category=category
+        )
+        assert set(search(client, 'властелин')) == {
+            'Властелин колец',
+            'Хоббит',
+        }, 'Проверьте поиск произведений по названию и описанию'
+
+    def test_search_index_follows_updates(self, client, title):
+        title.name = 'Зелёная миля'
+        title.save()
+        assert search(client, 'миля') == ['Зелёная миля']
+        assert search(client, 'Шоушенк') == []
+        title.delete()
+        assert search(client, 'миля') == []
+
+    def test_substring_in_description(self, client, category):
+        Title.objects.create(
+            name='Хоббит', description='Приквел Властелина', category=category
+        )
+        assert search(client, 'ласт') == ['Хоббит'], (
+            'Поиск должен находить подстроку описания, как и в PostgreSQL'
+        )
+        assert search(client, 'Пр') == ['Хоббит'], (
+            'Короткие запросы тоже ищут по описанию'
+        )
+
+    def test_short_term(self, client, title):
+        assert search(client, 'По') == [title.name]
+
+    def test_misspelled_name(self, client, title, category):
+        Title.objects.create(
+            name='Матрица', description='Киберпанк', category=category
+        )
+        assert search(client, 'Шоушенко') == [title.name], (
+            'Проверьте, что поиск находит название с опечаткой'
+        )
+        assert search(client, 'Шоссе') == []
@@ -0,0 +1,187 @@
+import pytest
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.identity import USER_KEY
+from reviews.models import Comment, DeletionJob, Review, User
+
+URL = '/api/v1/users/bulk/'
+
+
+@pytest.fixture
+def users(django_user_model):
+    return [
+        django_user_model.objects.create_user(
+            username=f'bulk{number}', email=f'bulk{number}@yamdb.fake'
+        )
+        for number in range(3)
+    ]
+
+
+def statuses(response):
+    return {
+        result['username']: result['status']
+        for result in response.json()['results']
+    }
+
+
+@pytest.mark.django_db
+class TestUserBulk:
+    def test_only_admin(self, client, user_client, users):
+        data = {'usernames': ['bulk0'], 'operation': 'deactivate'}
+        assert client.post(URL, data, format='json').status_code == 401
+        response = user_client.post(URL, data, format='json')
+        assert (
+            response.status_code == 403
+        ), 'Пакетные операции доступны только администратору'
+        assert User.objects.get(username='bulk0').is_active
+
+    def test_set_role(self, admin_client, users):
+        users[1].role = 'moderator'
+        users[1].save()
+        data = {
+            'usernames': ['bulk0', 'bulk1', 'missing', 'bulk0'],
+            'operation': 'set_role',
+            'role': 'moderator',
+        }
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 200, response.json()
+        assert response.json()['operation'] == 'set_role'
+        assert response.json()['results'] == [
+            {'username': 'bulk0', 'status': 'updated'},
+            {'username': 'bulk1', 'status': 'unchanged'},
+            {'username': 'missing', 'status': 'not_found'},
+        ], 'Проверьте статусы по каждому пользователю в порядке запроса'
+        assert set(
+            User.objects.filter(role='moderator').values_list(
+                'username', flat=True
+            )
+        ) == {'bulk0', 'bulk1'}
+
+    def test_query_count_is_constant(self, admin_client, django_user_model):
+        django_user_model.objects.bulk_create(
+            django_user_model(
+                username=f'many{number}', email=f'many{number}@yamdb.fake'
+            )
+            for number in range(50)
+        )
+        admin_client.get('/api/v1/users/me/')
+        data = {
+            'usernames': [f'many{number}' for number in range(50)],
+            'operation': 'deactivate',
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 200
+        assert set(statuses(response).values()) == {'updated'}
+        assert not User.objects.filter(
+            username__startswith='many', is_active=True
+        ).exists()
+        assert (
+            len(context) <= 5
+        ), 'Проверьте, что изменение выполняется одним обновлением'
+
+    def test_deactivate_revokes_token(self, admin_client, user, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        response = admin_client.post(
+            URL,
+            {'usernames': [user.username], 'operation': 'deactivate'},
+            format='json',
+        )
+        assert statuses(response) == {user.username: 'updated'}
+        assert (
+            user_client.get('/api/v1/users/me/').status_code == 401
+        ), 'Заблокированный пользователь не должен проходить аутентификацию'
+        response = admin_client.post(
+            URL,
+            {'usernames': [user.username], 'operation': 'activate'},
+            format='json',
+        )
+        assert statuses(response) == {user.username: 'updated'}
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+
+    def test_deactivate_seen_by_other_process(
+        self, admin_client, user, user_client, settings, tmp_path
+    ):
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                'FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+        # Другой процесс - другой экземпляр бэкенда с тем же хранилищем
+        other = FileBasedCache(str(tmp_path), {})
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        assert other.get(USER_KEY.format(user.pk))['is_active']
+        admin_client.post(
+            URL,
+            {'usernames': [user.username], 'operation': 'deactivate'},
+            format='json',
+        )
+        assert other.get(USER_KEY.format(user.pk)) is None, (
+            'Блокировка должна сбрасывать пользователя в общем кэше'
+        )
+
+    def test_delete_schedules_jobs(self, admin_client, users, title):
+        review = Review.objects.create(
+            title=title, author=users[0], text='Отзыв', score=5
+        )
+        Comment.objects.create(review=review, author=users[1], text='Текст')
+        response = admin_client.post(
+            URL,
+            {'usernames': ['bulk0', 'bulk1'], 'operation': 'delete'},
+            format='json',
+        )
+        assert statuses(response) == {
+            'bulk0': 'scheduled',
+            'bulk1': 'scheduled',
+        }
+        assert DeletionJob.objects.filter(model='user').count() == 2
+        listed = admin_client.get('/api/v1/users/').json()['results']
+        assert {item['username'] for item in listed} >= {'bulk2'}
+        assert not {item['username'] for item in listed} & {'bulk0', 'bulk1'}
+        response = admin_client.post(
+            URL,
+            {'usernames': ['bulk0'], 'operation': 'delete'},
+            format='json',
+        )
+        assert statuses(response) == {'bulk0': 'not_found'}
+
+    def test_admin_cannot_change_self(self, admin_client, admin, users):
+        response = admin_client.post(
+            URL,
+            {'usernames': [admin.username, 'bulk0'], 'operation': 'delete'},
+            format='json',
+        )
+        assert statuses(response) == {
+            admin.username: 'forbidden',
+            'bulk0': 'scheduled',
+        }
+        admin.refresh_from_db()
+        assert admin.is_active and not admin.pending_delete
+
+    @pytest.mark.parametrize(
+        'data',
+        [
+            {'usernames': [], 'operation': 'deactivate'},
+            {'usernames': ['bulk0'], 'operation': 'unknown'},
+            {'usernames': ['bulk0'], 'operation': 'set_role'},
+            {'usernames': ['bulk0'], 'operation': 'set_role', 'role': 'x'},
+            {'usernames': 'bulk0', 'operation': 'deactivate'},
+            {'usernames': ['bulk0'], 'operation': 'activate', 'role': 'admin'},
+        ],
+    )
+    def test_validation(self, admin_client, users, data):
+        response = admin_client.post(URL, data, format='json')
+        assert response.status_code == 400, response.json()
+
+    def test_size_limit(self, admin_client, settings, users):
+        settings.USERS_BULK_MAX = 2
+        response = admin_client.post(
+            URL,
+            {'usernames': ['bulk0', 'bulk1', 'bulk2'], 'operation': 'delete'},
+            format='json',
+        )
+        assert response.status_code == 400
+        assert not DeletionJob.objects.exists()
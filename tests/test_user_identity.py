@@ -0,0 +1,93 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.identity import USER_KEY
+
+from .conftest import get_client
+
+
+def users_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, [
+        query['sql'] for query in queries if 'reviews_user' in query['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestUserIdentity:
+    def test_authenticated_reads_skip_users_table(self, user_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        response, queries = users_queries(user_client, url)
+        assert response.status_code == 200
+        assert len(queries) == 1
+        response, queries = users_queries(user_client, url)
+        assert response.status_code == 200
+        assert queries == [], (
+            'Проверьте, что пользователь из токена берётся из кэша'
+        )
+
+    def test_cache_keeps_only_auth_fields(self, user, user_client):
+        user.bio = 'Обо мне'
+        user.save()
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert (response.json()['email'], response.json()['bio']) == (
+            user.email,
+            'Обо мне',
+        )
+        cached = cache.get(USER_KEY.format(user.pk))
+        assert set(cached) == {
+            'pk', 'username', 'role', 'is_superuser', 'is_active'
+        }, 'В кэше не должно быть пароля, почты и профиля'
+
+    def test_role_change_via_api(self, admin_client, user, user_client):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', {'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сбрасывает кэш пользователя'
+        )
+
+    def test_superuser_and_active_changes(self, user, user_client):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        user.is_superuser = True
+        user.save()
+        assert user_client.get('/api/v1/users/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_background_deletion_logs_out(self, admin_client, user):
+        client = get_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        admin_client.delete(f'/api/v1/users/{user.username}/?background=true')
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_me_update_keeps_password(self, user, user_client):
+        user_client.get('/api/v1/users/me/')
+        response = user_client.patch('/api/v1/users/me/', {'bio': 'Обо мне'})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.bio == 'Обо мне'
+        assert user.check_password('1234567')
+
+    def test_me_update_ignores_stale_cached_role(self, user, user_client):
+        user.role = 'moderator'
+        user.save()
+        user_client.get('/api/v1/users/me/')
+        stale = cache.get(USER_KEY.format(user.pk))
+        user.role = 'user'
+        user.save()
+        # Копия из кэша другого процесса, которую ещё не сбросили
+        cache.set(USER_KEY.format(user.pk), stale)
+        response = user_client.patch('/api/v1/users/me/', {'bio': 'Обо мне'})
+        assert response.status_code == 200
+        assert response.json()['role'] == 'user'
+        user.refresh_from_db()
+        assert (user.role, user.bio) == ('user', 'Обо мне'), (
+            'PATCH /users/me/ не должен возвращать отозванную роль'
+        )
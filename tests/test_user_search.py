@@ -0,0 +1,106 @@
+from io import StringIO
+
+import pytest
+from api.filters import prefix_search_key, prefix_upper_bound
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.expressions import CodePointCollate
+from reviews.models import User
+
+
+@pytest.fixture
+def users(django_user_model):
+    for username, email in (
+        ('Alice', 'alice@yamdb.fake'),
+        ('alina', 'lina@yamdb.fake'),
+        ('Al_bert', 'bert@yamdb.fake'),
+        ('malice', 'malice@yamdb.fake'),
+    ):
+        django_user_model.objects.create_user(username=username, email=email)
+
+
+def usernames(response):
+    return [user['username'] for user in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestUserSearch:
+    def test_prefix_case_insensitive(self, admin_client, users):
+        response = admin_client.get('/api/v1/users/', {'search': 'ALI'})
+        assert response.status_code == 200
+        assert usernames(response) == ['Alice', 'alina'], (
+            'Проверьте, что поиск идёт по началу имени без учёта регистра'
+        )
+
+    def test_like_wildcards_are_literal(self, admin_client, users):
+        response = admin_client.get('/api/v1/users/', {'search': 'al_'})
+        assert usernames(response) == ['Al_bert']
+
+    def test_email_search(self, admin_client, users):
+        response = admin_client.get(
+            '/api/v1/users/', {'search': 'LI', 'search_by': 'email'}
+        )
+        assert usernames(response) == ['alina']
+        response = admin_client.get(
+            '/api/v1/users/', {'search': 'a', 'search_by': 'role'}
+        )
+        assert response.status_code == 400
+
+    def test_search_uses_lower_index(self, admin_client, users):
+        with CaptureQueriesContext(connection) as queries:
+            admin_client.get('/api/v1/users/', {'search': 'ali'})
+        search_sql = [
+            query['sql']
+            for query in queries
+            if 'LOWER("reviews_user"."username")' in query['sql']
+            and '>=' in query['sql']
+        ]
+        assert search_sql
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {search_sql[-1]}')
+                plan = ' '.join(str(row) for row in cursor.fetchall())
+            assert 'user_username_lower' in plan, plan
+
+    @pytest.mark.parametrize(
+        'username, prefix', [('яна', 'Я'), ('zoe', 'Z'), ('юлия', 'ю')]
+    )
+    def test_last_letters_prefix(
+        self, admin_client, users, django_user_model, username, prefix
+    ):
+        django_user_model.objects.create_user(
+            username=username, email=f'{len(username)}{prefix}@yamdb.fake'
+        )
+        response = admin_client.get('/api/v1/users/', {'search': prefix})
+        assert usernames(response) == [username], (
+            'Проверьте поиск по префиксам, граница которых выходит за '
+            'пределы алфавита'
+        )
+
+    def test_search_key_matches_index(self):
+        key = prefix_search_key('username')
+        assert isinstance(key, CodePointCollate) and key.collation == 'C'
+        index = next(
+            index
+            for index in User._meta.indexes
+            if index.name == 'user_username_lower'
+        )
+        assert index.expressions == (key,), (
+            'Поиск и индекс должны использовать одно выражение'
+        )
+
+    def test_prefix_upper_bound(self):
+        assert prefix_upper_bound('abc') == 'abd'
+        assert prefix_upper_bound('я') == 'ѐ'
+
+    def test_benchmark_command(self, tmp_path):
+        output = tmp_path / 'report.json'
+        call_command(
+            'benchmark_user_search',
+            sizes=[50, 100],
+            repeat=1,
+            output=str(output),
+            stderr=StringIO(),
+        )
+        assert output.read_text().count('"users"') == 6